@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Script to create and refresh the dashboard materialized views.
+
+This script:
+1. Creates the pre-aggregated materialized views read by dashboard.py (if missing)
+2. Creates the unique index each view needs for REFRESH ... CONCURRENTLY
+3. Refreshes every view concurrently so dashboard reads are never blocked
+
+The pipeline and the JSON loader call refresh_dashboard_mviews() after every
+ingest, so the dashboard reads a handful of pre-aggregated rows instead of
+scanning the papers table on each cache miss.
+"""
+
+import sys
+import argparse
+from db_connection import DatabaseConnection
+
+
+# Median expressions for mv_summary_stats: approximate single-pass tdigest when the
+# extension is installed, exact sort-based PERCENTILE_CONT otherwise
+TDIGEST_MEDIAN = "tdigest_percentile({column}, 100, 0.5)"
+EXACT_MEDIAN = "PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY {column})"
+
+# View name -> (CREATE MATERIALIZED VIEW sql, CREATE UNIQUE INDEX sql)
+MATERIALIZED_VIEWS = [
+    ("mv_papers_by_year", """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_papers_by_year AS
+        SELECT
+            publication_year,
+            COUNT(*) as count
+        FROM papers
+        -- Bounded range keeps bad years (0, 9999) out of the chart and lets the
+        -- aggregate run as an index-only range scan on idx_papers_publication_year
+        WHERE publication_year BETWEEN 1950 AND EXTRACT(year FROM CURRENT_DATE)::int
+        GROUP BY publication_year;
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS mv_papers_by_year_key ON mv_papers_by_year(publication_year);"),
+    ("mv_papers_by_field", """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_papers_by_field AS
+        SELECT
+            field_name,
+            COUNT(*) as count
+        FROM papers
+        WHERE field_name IS NOT NULL
+        GROUP BY field_name;
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS mv_papers_by_field_key ON mv_papers_by_field(field_name);"),
+    ("mv_papers_by_subfield", """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_papers_by_subfield AS
+        SELECT
+            subfield_name,
+            COUNT(*) as count
+        FROM papers
+        WHERE subfield_name IS NOT NULL
+        GROUP BY subfield_name;
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS mv_papers_by_subfield_key ON mv_papers_by_subfield(subfield_name);"),
+    ("mv_open_access_stats", """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_open_access_stats AS
+        SELECT
+            oa_status,
+            COUNT(*) as count,
+            ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (), 2) as percentage
+        FROM papers
+        WHERE oa_status IS NOT NULL
+        GROUP BY oa_status;
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS mv_open_access_stats_key ON mv_open_access_stats(oa_status);"),
+    # Single row with every scalar statistic shown on the dashboard
+    ("mv_summary_stats", """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_summary_stats AS
+        SELECT
+            1 as id,
+            COUNT(*) as total_papers,
+            
+            -- Citation statistics
+            COUNT(cited_by_count) as cited_papers,
+            AVG(cited_by_count) as avg_citations,
+            MAX(cited_by_count) as max_citations,
+            {median_citations} as median_citations,
+            -- Scalar subqueries so each count is an index-only scan of a small partial index
+            (SELECT COUNT(*) FROM papers WHERE is_top_10_percent) as top_10_percent_count,
+            (SELECT COUNT(*) FROM papers WHERE is_top_1_percent) as top_1_percent_count,
+            
+            -- Collaboration statistics
+            AVG(countries_count) as avg_countries,
+            AVG(institutions_count) as avg_institutions,
+            MAX(countries_count) as max_countries,
+            MAX(institutions_count) as max_institutions,
+            
+            -- Field-Weighted Citation Impact statistics
+            AVG(fwci) as avg_fwci,
+            {median_fwci} as median_fwci,
+            MAX(fwci) as max_fwci
+        FROM papers;
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS mv_summary_stats_key ON mv_summary_stats(id);"),
+]
+
+
+def create_dashboard_mviews(cur=None):
+    """
+    Create all dashboard materialized views and their unique indexes if they don't exist.
+    
+    The median expressions are fixed when mv_summary_stats is created; drop the
+    view after installing tdigest to switch it to approximate medians.
+    
+    Args:
+        cur: Cursor to run the DDL on, so it commits together with the caller's
+            transaction. If None, a pooled cursor is opened and committed here.
+    """
+    if cur is None:
+        with DatabaseConnection.get_cursor() as own_cur:
+            create_dashboard_mviews(own_cur)
+        return
+    
+    cur.execute("SELECT EXISTS (SELECT FROM pg_extension WHERE extname = 'tdigest');")
+    median = TDIGEST_MEDIAN if cur.fetchone()[0] else EXACT_MEDIAN
+    
+    cur.execute("\n".join(
+        view_sql.format(
+            median_citations=median.format(column='cited_by_count'),
+            median_fwci=median.format(column='fwci'),
+        ) + "\n" + index_sql
+        for _, view_sql, index_sql in MATERIALIZED_VIEWS
+    ))
+    for view_name, _, _ in MATERIALIZED_VIEWS:
+        print(f"  ✓ Materialized view checked/created: {view_name}")
+
+
+def drop_dashboard_mviews():
+    """Drop all dashboard materialized views so they are recreated from the current definitions."""
+    with DatabaseConnection.get_cursor() as cur:
+        cur.execute("DROP MATERIALIZED VIEW IF EXISTS " + ", ".join(
+            view_name for view_name, _, _ in MATERIALIZED_VIEWS
+        ) + ";")
+        print(f"  ✓ Dropped {len(MATERIALIZED_VIEWS)} dashboard materialized views")
+
+
+def refresh_dashboard_mviews():
+    """
+    Create (if needed) and refresh all dashboard materialized views.
+    
+    Uses REFRESH MATERIALIZED VIEW CONCURRENTLY so the dashboard can keep
+    reading the previous contents while the views are rebuilt.
+    """
+    create_dashboard_mviews()
+    
+    with DatabaseConnection.get_cursor() as cur:
+        # Let the full-table aggregates behind the views run as parallel scans.
+        # SET LOCAL only lasts for this transaction, so it is safe through the pooler.
+        cur.execute("SET LOCAL max_parallel_workers_per_gather = 4;")
+        cur.execute("\n".join(
+            f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view_name};"
+            for view_name, _, _ in MATERIALIZED_VIEWS
+        ))
+        print(f"  ✓ Refreshed {len(MATERIALIZED_VIEWS)} dashboard materialized views")
+
+
+def main():
+    """Main function to create and refresh the dashboard materialized views."""
+    parser = argparse.ArgumentParser(
+        description='Create and refresh the dashboard materialized views'
+    )
+    parser.add_argument(
+        '--recreate',
+        action='store_true',
+        help='Drop and recreate every view (needed after a view definition changes)'
+    )
+    args = parser.parse_args()
+    
+    print("Refreshing dashboard materialized views...")
+    print("=" * 50)
+    
+    try:
+        if args.recreate:
+            drop_dashboard_mviews()
+        
+        refresh_dashboard_mviews()
+        
+        print("\n" + "=" * 50)
+        print("✓ Dashboard materialized views are up to date!")
+    
+    except Exception as e:
+        print(f"\n✗ Error refreshing materialized views: {e}")
+        sys.exit(1)
+    finally:
+        DatabaseConnection.close_all_connections()
+
+
+if __name__ == '__main__':
+    main()
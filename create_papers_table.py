@@ -4,34 +4,54 @@ Script to create the papers table in the database if it doesn't exist.
 
 This script:
 1. Checks if the papers table exists
-2. Creates the pg_trgm extension if needed (for text search)
+2. Creates the pg_trgm extension (for text search) and tdigest (if available)
 3. Creates the papers table with all columns, indexes, and comments
-4. Uses the DatabaseConnection module for database operations
+4. Installs the validate_papers() data quality function (validate_papers.sql)
+5. Uses the DatabaseConnection module for database operations
 """
 
+import os
 import sys
-from db_connection import DatabaseConnection
+import hashlib
+import argparse
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+from db_connection import DatabaseConnection, PLANNER_SETTINGS, apply_planner_settings
+from create_dashboard_mviews import create_dashboard_mviews
+
+
+# validate_papers() (the server-side data quality checks read by test_papers_data.py)
+# is installed from this file; its hash is stored as the function's comment so the
+# validator can tell a stale definition apart from the current one
+VALIDATE_PAPERS_SQL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'validate_papers.sql')
+with open(VALIDATE_PAPERS_SQL_PATH, encoding='utf-8') as f:
+    VALIDATE_PAPERS_SQL = f.read()
+VALIDATE_PAPERS_VERSION = hashlib.md5(VALIDATE_PAPERS_SQL.encode('utf-8')).hexdigest()
 
 
 def table_exists() -> bool:
     """Check if the papers table exists in the database."""
-    with DatabaseConnection.get_cursor() as cur:
-        cur.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'public' 
-                AND table_name = 'papers'
-            );
-        """)
-        result = cur.fetchone()
-        return result[0] if result else False
+    # Direct catalog lookup (NULL when missing) instead of the information_schema
+    # view; read-only, so the cursor runs in autocommit and skips the COMMIT
+    with DatabaseConnection.get_cursor(readonly=True) as cur:
+        cur.execute("SELECT to_regclass('public.papers') IS NOT NULL;")
+        return cur.fetchone()[0]
 
 
-def create_pg_trgm_extension():
-    """Create the pg_trgm extension if it doesn't exist."""
+def create_extensions():
+    """Create the pg_trgm extension, and the tdigest extension if the server provides it."""
     with DatabaseConnection.get_cursor() as cur:
         cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
         print("✓ pg_trgm extension checked/created")
+        
+        # tdigest is optional: when installed, the dashboard medians use it instead of an exact sort
+        cur.execute("SELECT EXISTS (SELECT FROM pg_available_extensions WHERE name = 'tdigest');")
+        if cur.fetchone()[0]:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS tdigest;")
+            print("✓ tdigest extension checked/created")
+        else:
+            print("ℹ tdigest extension not available; dashboard medians will be computed exactly")
 
 
 def create_papers_table():
@@ -45,13 +65,15 @@ def create_papers_table():
         
         -- Basic paper information
         title TEXT NOT NULL,
+        title_short VARCHAR(200) GENERATED ALWAYS AS (substring(lower(title), 1, 200)) STORED,  -- trigram search key
+        title_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', title)) STORED,  -- full-text search
         paper_type VARCHAR(50),  -- article, etc.
         publication_date DATE,
         publication_year INTEGER,
         
         -- Primary topic/classification (flattened from nested structure)
         primary_topic_name VARCHAR(255),
-        primary_topic_score DECIMAL(10, 8),
+        primary_topic_score DOUBLE PRECISION,
         subfield_name VARCHAR(255),  -- e.g., "Artificial Intelligence"
         field_name VARCHAR(255),     -- e.g., "Computer Science"
         domain_name VARCHAR(255),
@@ -62,12 +84,12 @@ def create_papers_table():
         
         -- Citation metrics (quantitative)
         cited_by_count INTEGER DEFAULT 0,
-        citation_percentile DECIMAL(10, 8),  -- 0.0 to 1.0
+        citation_percentile DOUBLE PRECISION,  -- 0.0 to 1.0
         is_top_1_percent BOOLEAN,
         is_top_10_percent BOOLEAN,
         citation_percentile_min INTEGER,  -- min percentile year
         citation_percentile_max INTEGER,  -- max percentile year
-        fwci DECIMAL(10, 8),  -- Field-Weighted Citation Impact
+        fwci DOUBLE PRECISION,  -- Field-Weighted Citation Impact
         
         -- Collaboration metrics (quantitative)
         countries_count INTEGER DEFAULT 0,
@@ -76,7 +98,7 @@ def create_papers_table():
         -- Metadata
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+    ) WITH (fillfactor = 85, autovacuum_vacuum_scale_factor = 0.02);
     """
     
     with DatabaseConnection.get_cursor() as cur:
@@ -84,42 +106,347 @@ def create_papers_table():
         print("✓ Papers table created")
 
 
-def create_indexes():
-    """Create all indexes for the papers table."""
-    indexes = [
-        ("idx_papers_publication_date", "CREATE INDEX idx_papers_publication_date ON papers(publication_date);"),
-        ("idx_papers_publication_year", "CREATE INDEX idx_papers_publication_year ON papers(publication_year);"),
-        ("idx_papers_cited_by_count", "CREATE INDEX idx_papers_cited_by_count ON papers(cited_by_count);"),
-        ("idx_papers_oa_status", "CREATE INDEX idx_papers_oa_status ON papers(oa_status);"),
-        ("idx_papers_subfield", "CREATE INDEX idx_papers_subfield ON papers(subfield_name);"),
-        ("idx_papers_field", "CREATE INDEX idx_papers_field ON papers(field_name);"),
-        ("idx_papers_primary_topic", "CREATE INDEX idx_papers_primary_topic ON papers(primary_topic_name);"),
-        ("idx_papers_citation_percentile", "CREATE INDEX idx_papers_citation_percentile ON papers(citation_percentile);"),
-        ("idx_papers_fwci", "CREATE INDEX idx_papers_fwci ON papers(fwci);"),
-        ("idx_papers_title_trgm", "CREATE INDEX idx_papers_title_trgm ON papers USING gin(title gin_trgm_ops);"),
-    ]
+# Index name -> DDL for every secondary index on the papers table
+INDEXES = [
+    ("idx_papers_publication_date", "CREATE INDEX idx_papers_publication_date ON papers(publication_date);"),
+    ("idx_papers_pubdate_brin", "CREATE INDEX idx_papers_pubdate_brin ON papers USING brin(publication_date) WITH (pages_per_range = 32);"),
+    ("idx_papers_publication_year", "CREATE INDEX idx_papers_publication_year ON papers(publication_year);"),
+    ("idx_papers_top_cited", "CREATE INDEX idx_papers_top_cited ON papers(cited_by_count DESC) INCLUDE (publication_year, field_name, subfield_name, oa_status, citation_percentile) WHERE cited_by_count IS NOT NULL;"),
+    ("idx_papers_primary_topic", "CREATE INDEX idx_papers_primary_topic ON papers(primary_topic_name);"),
+    ("idx_papers_citation_percentile", "CREATE INDEX idx_papers_citation_percentile ON papers(citation_percentile);"),
+    ("idx_papers_fwci", "CREATE INDEX idx_papers_fwci ON papers(fwci);"),
+    ("idx_papers_top1", "CREATE INDEX idx_papers_top1 ON papers(id) WHERE is_top_1_percent;"),
+    ("idx_papers_top10", "CREATE INDEX idx_papers_top10 ON papers(id) WHERE is_top_10_percent;"),
+    ("idx_papers_empty_title", "CREATE INDEX idx_papers_empty_title ON papers(id) WHERE title IS NULL OR title = '';"),
+    ("idx_papers_negative_counts", "CREATE INDEX idx_papers_negative_counts ON papers(id) WHERE cited_by_count < 0 OR countries_count < 0 OR institutions_count < 0;"),
+    ("idx_papers_invalid_scores", "CREATE INDEX idx_papers_invalid_scores ON papers(id) WHERE citation_percentile < 0.0 OR citation_percentile > 1.0 OR primary_topic_score < 0.0 OR primary_topic_score > 1.0 OR fwci < 0.0;"),
+    ("idx_papers_doi", "CREATE INDEX idx_papers_doi ON papers(doi) WHERE doi IS NOT NULL AND doi != '';"),
+    ("idx_papers_title_short_trgm", "CREATE INDEX idx_papers_title_short_trgm ON papers USING gin(title_short gin_trgm_ops);"),
+    ("idx_papers_title_tsv", "CREATE INDEX idx_papers_title_tsv ON papers USING gin(title_tsv);"),
+]
+
+# Indexes from earlier schema versions that are dropped when indexes are (re)created
+OBSOLETE_INDEXES = [
+    "idx_papers_cited_by_count",  # superseded by idx_papers_top_cited
+    "idx_papers_title_trgm",  # superseded by idx_papers_title_short_trgm / idx_papers_title_tsv
+    # Low-cardinality columns that are only grouped (in the dashboard views), never filtered on
+    "idx_papers_oa_status",
+    "idx_papers_field",
+    "idx_papers_subfield",
+]
+
+
+def add_title_search_columns():
+    """
+    Add the generated title search columns to a papers table created before they existed.
     
+    Adding a stored generated column rewrites the table once; afterwards both
+    columns are maintained by PostgreSQL on every insert/update.
+    """
     with DatabaseConnection.get_cursor() as cur:
-        for idx_name, idx_sql in indexes:
-            # Check if index already exists
-            cur.execute("""
-                SELECT EXISTS (
-                    SELECT FROM pg_indexes 
-                    WHERE schemaname = 'public' 
-                    AND indexname = %s
-                );
-            """, (idx_name,))
-            exists = cur.fetchone()[0]
-            
-            if exists:
+        cur.execute("""
+            ALTER TABLE papers
+                ADD COLUMN IF NOT EXISTS title_short VARCHAR(200)
+                    GENERATED ALWAYS AS (substring(lower(title), 1, 200)) STORED,
+                ADD COLUMN IF NOT EXISTS title_tsv TSVECTOR
+                    GENERATED ALWAYS AS (to_tsvector('english', title)) STORED;
+        """)
+        print("  ✓ Title search columns checked/added: title_short, title_tsv")
+
+
+def apply_storage_parameters():
+    """
+    Apply the papers table's storage parameters to a table created before they existed.
+    
+    Keep in sync with the WITH (...) clause in create_papers_table. Only changes
+    catalog settings (no rewrite): fillfactor applies to pages written from now on.
+    """
+    with DatabaseConnection.get_cursor() as cur:
+        cur.execute("ALTER TABLE papers SET (fillfactor = 85, autovacuum_vacuum_scale_factor = 0.02);")
+        print("  ✓ Storage parameters set: fillfactor=85, autovacuum_vacuum_scale_factor=0.02")
+
+
+def title_search_columns_exist() -> bool:
+    """Check whether the generated title search columns (added by --migrate) exist."""
+    with DatabaseConnection.get_cursor(readonly=True) as cur:
+        cur.execute("""
+            SELECT COUNT(*) = 2 FROM pg_attribute
+            WHERE attrelid = 'papers'::regclass
+            AND attname IN ('title_short', 'title_tsv')
+            AND NOT attisdropped;
+        """)
+        return cur.fetchone()[0]
+
+
+# Score columns stored as DOUBLE PRECISION (earlier schema versions used DECIMAL(10, 8))
+DOUBLE_PRECISION_COLUMNS = ["primary_topic_score", "citation_percentile", "fwci"]
+
+
+def convert_score_columns_to_double():
+    """
+    Convert score columns still stored as NUMERIC to DOUBLE PRECISION.
+    
+    The type change rewrites the table and rebuilds the indexes on these columns.
+    mv_summary_stats reads fwci, so it is dropped before the change and recreated
+    after, in the same transaction: if anything fails, the old view stays.
+    """
+    with DatabaseConnection.get_cursor() as cur:
+        cur.execute("""
+            SELECT column_name FROM information_schema.columns 
+            WHERE table_schema = 'public' 
+            AND table_name = 'papers'
+            AND data_type = 'numeric'
+            AND column_name = ANY(%s);
+        """, (DOUBLE_PRECISION_COLUMNS,))
+        numeric_columns = [row[0] for row in cur.fetchall()]
+        
+        if not numeric_columns:
+            print("  - Score columns already DOUBLE PRECISION")
+            return
+        
+        cur.execute("DROP MATERIALIZED VIEW IF EXISTS mv_summary_stats;")
+        cur.execute("ALTER TABLE papers " + ", ".join(
+            f"ALTER COLUMN {column} TYPE DOUBLE PRECISION" for column in numeric_columns
+        ) + ";")
+        for column in numeric_columns:
+            print(f"  ✓ Converted {column} to DOUBLE PRECISION")
+        
+        create_dashboard_mviews(cur)
+
+
+def get_existing_indexes(cur) -> set:
+    """Return the names of all indexes currently defined on the papers table."""
+    cur.execute("""
+        SELECT indexname FROM pg_indexes 
+        WHERE schemaname = 'public' 
+        AND tablename = 'papers';
+    """)
+    return {row[0] for row in cur.fetchall()}
+
+
+def create_indexes(concurrent: bool = False):
+    """
+    Create all missing indexes for the papers table.
+    
+    Existing indexes are looked up in a single query and every missing index is
+    created in one round-trip.
+    
+    Args:
+        concurrent: If True, build each missing index with CREATE INDEX CONCURRENTLY
+            outside a transaction so a populated table stays readable and writable
+            (use this when re-indexing after a bulk load).
+    """
+    if concurrent:
+        create_indexes_concurrently()
+        return
+    
+    with DatabaseConnection.get_cursor() as cur:
+        existing = get_existing_indexes(cur)
+        missing = [(idx_name, idx_sql) for idx_name, idx_sql in INDEXES if idx_name not in existing]
+        
+        for idx_name, _ in INDEXES:
+            if idx_name in existing:
                 print(f"  - Index already exists: {idx_name}")
-            else:
+        
+        obsolete = [idx_name for idx_name in OBSOLETE_INDEXES if idx_name in existing]
+        if obsolete:
+            cur.execute(f"DROP INDEX IF EXISTS {', '.join(obsolete)};")
+            for idx_name in obsolete:
+                print(f"  ✓ Dropped obsolete index: {idx_name}")
+        
+        if not missing:
+            return
+        
+        try:
+            cur.execute("\n".join(idx_sql for _, idx_sql in missing))
+        except Exception as e:
+            print(f"  ✗ Failed to create indexes: {e}")
+            raise
+        
+        for idx_name, _ in missing:
+            print(f"  ✓ Created index: {idx_name}")
+
+
+def create_indexes_concurrently():
+    """Create all missing indexes with CREATE INDEX CONCURRENTLY (one per statement, autocommit)."""
+    with DatabaseConnection.get_connection_context() as conn:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        conn.autocommit = True
+        try:
+            cur = conn.cursor()
+            existing = get_existing_indexes(cur)
+            
+            for idx_name in OBSOLETE_INDEXES:
+                if idx_name in existing:
+                    # DROP INDEX CONCURRENTLY only accepts a single index
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {idx_name};")
+                    print(f"  ✓ Dropped obsolete index: {idx_name}")
+            
+            for idx_name, idx_sql in INDEXES:
+                if idx_name in existing:
+                    print(f"  - Index already exists: {idx_name}")
+                    continue
+                
                 try:
-                    cur.execute(idx_sql)
-                    print(f"  ✓ Created index: {idx_name}")
+                    cur.execute(idx_sql.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1))
+                    print(f"  ✓ Created index concurrently: {idx_name}")
                 except Exception as e:
                     print(f"  ✗ Failed to create index {idx_name}: {e}")
                     raise
+            
+            cur.close()
+        finally:
+            conn.autocommit = False
+
+
+# Marks the table's clustering index so a plain `CLUSTER papers;` keeps rows in date
+# order. Dropping the index clears the mark, so it is re-issued after every rebuild.
+CLUSTER_ON_SQL = "ALTER TABLE papers CLUSTER ON idx_papers_publication_date;"
+
+# Connections building indexes at once after a bulk load
+INDEX_BUILD_WORKERS = 4
+
+
+def create_indexes_in_parallel(max_workers: int = INDEX_BUILD_WORKERS,
+                               names: Optional[Iterable[str]] = None):
+    """
+    Create missing indexes at once, each on its own pooled connection.
+    
+    Every build scans the whole table, so running them side by side takes
+    roughly as long as the slowest (the GIN indexes) instead of the sum.
+    Plain CREATE INDEX is used on purpose: its SHARE lock lets builds on the same
+    table run together and keeps the table readable, whereas CREATE INDEX
+    CONCURRENTLY builds on one table wait for each other. Writes to papers wait
+    until the builds finish, so use this right after a load, not alongside one.
+    
+    Args:
+        max_workers: Maximum number of indexes built at the same time
+        names: Only build these INDEXES entries (default: every missing one)
+    """
+    with DatabaseConnection.get_cursor() as cur:
+        existing = get_existing_indexes(cur)
+    wanted = None if names is None else set(names)
+    missing = [
+        (idx_name, idx_sql) for idx_name, idx_sql in INDEXES
+        if idx_name not in existing and (wanted is None or idx_name in wanted)
+    ]
+    
+    def build(idx_name, idx_sql):
+        with DatabaseConnection.get_cursor() as cur:
+            cur.execute(idx_sql)
+        print(f"  ✓ Created index: {idx_name}")
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(build, idx_name, idx_sql) for idx_name, idx_sql in missing]
+        # Wait for every build before raising the first failure
+        errors = [future.exception() for future in futures]
+    
+    for (idx_name, _), error in zip(missing, errors):
+        if error is not None:
+            print(f"  ✗ Failed to create index {idx_name}: {error}")
+    for error in errors:
+        if error is not None:
+            raise error
+
+
+# Loads of more than this many papers drop the secondary indexes and rebuild them
+# afterwards. Rebuilding scans the whole table, so smaller incremental loads are
+# cheaper with the indexes in place.
+BULK_LOAD_THRESHOLD = 10000
+
+
+@contextmanager
+def secondary_indexes_dropped(enabled: bool = True):
+    """
+    Context manager that drops the secondary indexes for a large incremental load.
+    
+    The load runs in its own transactions and commits as it goes, so the
+    indexes are dropped up front and rebuilt on exit with
+    create_indexes_in_parallel, one sort-based build per index instead of one
+    index update per row. The rebuild also runs when the load fails, so the table is
+    never left without its indexes. The primary key and the unique openalex_id
+    constraint are kept so ON CONFLICT upserts keep working.
+    
+    Example:
+        with secondary_indexes_dropped(len(papers) > BULK_LOAD_THRESHOLD):
+            insert_papers(papers)
+    
+    Args:
+        enabled: If False, do nothing (lets callers decide per load without branching)
+    """
+    if not enabled:
+        yield
+        return
+    
+    with DatabaseConnection.get_cursor() as cur:
+        existing = get_existing_indexes(cur)
+        dropped = [idx_name for idx_name, _ in INDEXES if idx_name in existing]
+        if dropped:
+            cur.execute(f"DROP INDEX IF EXISTS {', '.join(dropped)};")
+            print(f"  ✓ Dropped {len(dropped)} indexes for bulk load")
+    
+    try:
+        yield
+    finally:
+        # Only what was dropped: a table created before --migrate has no title search
+        # columns, so rebuilding every INDEXES entry would fail after the load
+        print("\nRebuilding indexes after bulk load...")
+        create_indexes_in_parallel(names=dropped)
+        if 'idx_papers_publication_date' in dropped:
+            with DatabaseConnection.get_cursor() as cur:
+                cur.execute(CLUSTER_ON_SQL)
+
+
+def cluster_papers_table():
+    """
+    Rewrite the papers table in publication_date order.
+    
+    CLUSTER ... USING also records idx_papers_publication_date as the table's
+    clustering index, so a later plain `CLUSTER papers;` keeps the same order.
+    Takes an exclusive lock for the duration of the rewrite; run it after bulk loads.
+    """
+    with DatabaseConnection.get_cursor() as cur:
+        cur.execute("CLUSTER papers USING idx_papers_publication_date;")
+        cur.execute("ANALYZE papers;")
+        print("  ✓ Clustered papers table on idx_papers_publication_date")
+
+
+def vacuum_freeze_papers():
+    """
+    Run VACUUM (FREEZE, ANALYZE) on the papers table.
+    
+    Marks every page all-visible so the covering and partial indexes can answer
+    with index-only scans, and refreshes planner statistics.
+    """
+    with DatabaseConnection.get_connection_context() as conn:
+        # VACUUM cannot run inside a transaction block
+        conn.autocommit = True
+        try:
+            cur = conn.cursor()
+            cur.execute("VACUUM (FREEZE, ANALYZE) papers;")
+            cur.close()
+            print("  ✓ Vacuumed (freeze, analyze) papers table")
+        finally:
+            conn.autocommit = False
+
+
+def install_validate_function():
+    """
+    Install (or reinstall) validate_papers() from validate_papers.sql if it is
+    missing or its recorded version differs from the file.
+    
+    The DROP, CREATE and COMMENT run in one transaction, so validator runs see
+    either the old or the new definition, never a missing function.
+    """
+    with DatabaseConnection.get_cursor() as cur:
+        cur.execute("SELECT obj_description(to_regprocedure('validate_papers()'), 'pg_proc');")
+        if cur.fetchone()[0] == VALIDATE_PAPERS_VERSION:
+            print("  - validate_papers() function is up to date")
+            return
+        
+        cur.execute(VALIDATE_PAPERS_SQL)
+        cur.execute("COMMENT ON FUNCTION validate_papers() IS %s;", (VALIDATE_PAPERS_VERSION,))
+        print("  ✓ Installed validate_papers() function")
 
 
 def add_comments():
@@ -133,25 +460,94 @@ def add_comments():
     ]
     
     with DatabaseConnection.get_cursor() as cur:
-        for obj_type, obj_name, comment_text in comments:
-            cur.execute(f"COMMENT ON {obj_type} {obj_name} IS %s;", (comment_text,))
+        # All comments in one round-trip
+        cur.execute(
+            "\n".join(f"COMMENT ON {obj_type} {obj_name} IS %s;" for obj_type, obj_name, _ in comments),
+            [comment_text for _, _, comment_text in comments]
+        )
+        for _, obj_name, _ in comments:
             print(f"  ✓ Added comment to {obj_name}")
 
 
 def main():
     """Main function to create the papers table if it doesn't exist."""
+    parser = argparse.ArgumentParser(
+        description='Create the papers table with all indexes and comments'
+    )
+    parser.add_argument(
+        '--concurrent',
+        action='store_true',
+        help='If the table already exists, create any missing indexes with '
+             'CREATE INDEX CONCURRENTLY (e.g. after a bulk load)'
+    )
+    parser.add_argument(
+        '--migrate',
+        action='store_true',
+        help='If the table already exists, bring it up to the current schema (adds the '
+             'generated title search columns and converts NUMERIC score columns to DOUBLE '
+             'PRECISION, sets the storage parameters). Rewrites the table under an ACCESS EXCLUSIVE lock: reads and '
+             'writes block until it finishes'
+    )
+    parser.add_argument(
+        '--planner-settings',
+        action='store_true',
+        help='Persist the SSD planner settings (random_page_cost, jit, and '
+             'effective_cache_size if DB_EFFECTIVE_CACHE_SIZE is set) as defaults '
+             'for the database role; affects every client of the role'
+    )
+    parser.add_argument(
+        '--cluster',
+        action='store_true',
+        help='If the table already exists, physically reorder it by publication_date '
+             '(CLUSTER; locks the table while it is rewritten)'
+    )
+    args = parser.parse_args()
+    
     print("Creating papers table...")
     print("=" * 50)
     
     try:
+        # Role-level planner defaults (apply to every new server session), opt-in only
+        if args.planner_settings:
+            try:
+                apply_planner_settings()
+                print("✓ Planner settings applied: " + ", ".join(
+                    f"{name}={value}" for name, value in PLANNER_SETTINGS.items()
+                ))
+            except Exception as e:
+                print(f"⚠ Could not apply planner settings: {e}")
+        
         # Check if table already exists
         if table_exists():
+            # Keep the data quality function read by test_papers_data.py current
+            install_validate_function()
+            if args.migrate:
+                print("ℹ Papers table already exists. Migrating it to the current schema...")
+                print("⚠ The migration rewrites the table and locks it (ACCESS EXCLUSIVE) "
+                      "until it finishes")
+                add_title_search_columns()
+                convert_score_columns_to_double()
+                apply_storage_parameters()
+            if args.concurrent:
+                # The title search indexes are built on the migrated columns
+                if not title_search_columns_exist():
+                    print("✗ The papers table predates the title search columns. "
+                          "Run with --migrate first.")
+                    sys.exit(1)
+                print("ℹ Papers table already exists. Creating missing indexes concurrently...")
+                create_indexes(concurrent=True)
+            if args.cluster:
+                print("ℹ Papers table already exists. Clustering on publication_date...")
+                cluster_papers_table()
+            if args.migrate or args.concurrent or args.cluster:
+                vacuum_freeze_papers()
+                return
             print("ℹ Papers table already exists. Skipping creation.")
             return
         
-        # Create pg_trgm extension (needed for text search index)
-        print("\n1. Checking pg_trgm extension...")
-        create_pg_trgm_extension()
+        # Create extensions (pg_trgm is needed for the text search index)
+        print("\n1. Checking extensions...")
+        create_extensions()
         
         # Create the table
         print("\n2. Creating papers table...")
@@ -161,10 +557,18 @@ def main():
         print("\n3. Creating indexes...")
         create_indexes()
         
+        # Mark the clustering index so CLUSTER after a bulk load keeps rows in date order
+        with DatabaseConnection.get_cursor() as cur:
+            cur.execute(CLUSTER_ON_SQL)
+        
         # Add comments
         print("\n4. Adding table and column comments...")
         add_comments()
         
+        # Install the data quality function
+        print("\n5. Installing data quality function...")
+        install_validate_function()
+        
         print("\n" + "=" * 50)
         print("✓ Successfully created papers table with all indexes and comments!")
         
@@ -43,144 +43,233 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Single round-trip query for every dashboard section. Aggregates are read from
+# the materialized views maintained by create_dashboard_mviews.py (refreshed on
+# every ingest), so only the top papers list touches the papers table itself.
+# Tabular sections come back column-oriented ({column: [values, ...]}) so they
+# load straight into DataFrames without building a Python dict per row; a
+# section with no rows has None for every column.
+DASHBOARD_STATS_QUERY = """
+    SELECT json_build_object(
+        'total_papers', (SELECT total_papers FROM mv_summary_stats),
+        'papers_by_year', (
+            SELECT json_build_object(
+                'publication_year', json_agg(publication_year ORDER BY publication_year),
+                'count', json_agg(count ORDER BY publication_year)
+            )
+            FROM mv_papers_by_year
+        ),
+        'papers_by_field', (
+            SELECT json_build_object(
+                'field_name', json_agg(field_name ORDER BY count DESC),
+                'count', json_agg(count ORDER BY count DESC)
+            )
+            FROM (
+                SELECT field_name, count
+                FROM mv_papers_by_field
+                ORDER BY count DESC
+                LIMIT 10
+            ) f
+        ),
+        'papers_by_subfield', (
+            SELECT json_build_object(
+                'subfield_name', json_agg(subfield_name ORDER BY count DESC),
+                'count', json_agg(count ORDER BY count DESC)
+            )
+            FROM (
+                SELECT subfield_name, count
+                FROM mv_papers_by_subfield
+                ORDER BY count DESC
+                LIMIT 10
+            ) sf
+        ),
+        'open_access_stats', (
+            SELECT json_build_object(
+                'oa_status', json_agg(oa_status ORDER BY count DESC),
+                'count', json_agg(count ORDER BY count DESC),
+                'percentage', json_agg(percentage ORDER BY count DESC)
+            )
+            FROM mv_open_access_stats
+        ),
+        'citation_stats', (
+            SELECT row_to_json(c)
+            FROM (
+                SELECT 
+                    cited_papers as total_papers,
+                    avg_citations,
+                    max_citations,
+                    median_citations,
+                    top_10_percent_count,
+                    top_1_percent_count
+                FROM mv_summary_stats
+            ) c
+        ),
+        'collaboration_stats', (
+            SELECT row_to_json(cl)
+            FROM (
+                SELECT avg_countries, avg_institutions, max_countries, max_institutions
+                FROM mv_summary_stats
+            ) cl
+        ),
+        'fwci_stats', (
+            SELECT row_to_json(fw)
+            FROM (
+                SELECT avg_fwci, median_fwci, max_fwci
+                FROM mv_summary_stats
+            ) fw
+        ),
+        'top_papers', (
+            SELECT json_build_object(
+                'title', json_agg(title ORDER BY cited_by_count DESC),
+                'publication_year', json_agg(publication_year ORDER BY cited_by_count DESC),
+                'cited_by_count', json_agg(cited_by_count ORDER BY cited_by_count DESC),
+                'field_name', json_agg(field_name ORDER BY cited_by_count DESC),
+                'subfield_name', json_agg(subfield_name ORDER BY cited_by_count DESC),
+                'oa_status', json_agg(oa_status ORDER BY cited_by_count DESC),
+                'citation_percentile', json_agg(citation_percentile ORDER BY cited_by_count DESC)
+            )
+            FROM (
+                SELECT 
+                    -- Truncated for display here so full titles never cross the wire
+                    CASE WHEN length(title) > 80 THEN substring(title, 1, 80) || '...' ELSE title END as title,
+                    publication_year,
+                    cited_by_count,
+                    field_name,
+                    subfield_name,
+                    oa_status,
+                    citation_percentile
+                FROM papers
+                WHERE cited_by_count IS NOT NULL
+                ORDER BY cited_by_count DESC
+                LIMIT %s
+            ) tp
+        )
+    ) as stats;
+"""
+
+
+@st.cache_resource
+def get_connection_pool():
+    """Create the shared connection pool once per server process (survives reruns)."""
+    return DatabaseConnection.get_pool()
+
+
 @st.cache_data(ttl=300)  # Cache for 5 minutes
+def get_all_dashboard_stats(top_papers_limit=20):
+    """Get every dashboard section in a single database round-trip."""
+    result = execute_query_dict(DASHBOARD_STATS_QUERY, params=(top_papers_limit,))
+    return result[0]['stats'] if result else {}
+
+
 def get_total_papers():
     """Get total number of papers."""
-    query = "SELECT COUNT(*) as count FROM papers;"
-    result = execute_query_dict(query)
-    return result[0]['count'] if result else 0
+    return get_all_dashboard_stats().get('total_papers', 0)
 
 
-@st.cache_data(ttl=300)
 def get_papers_by_year():
     """Get papers count grouped by publication year."""
-    query = """
-        SELECT 
-            publication_year,
-            COUNT(*) as count
-        FROM papers
-        WHERE publication_year IS NOT NULL
-        GROUP BY publication_year
-        ORDER BY publication_year;
-    """
-    return execute_query_dict(query)
+    return get_all_dashboard_stats().get('papers_by_year') or {}
 
 
-@st.cache_data(ttl=300)
 def get_papers_by_field():
     """Get papers count grouped by field."""
-    query = """
-        SELECT 
-            field_name,
-            COUNT(*) as count
-        FROM papers
-        WHERE field_name IS NOT NULL
-        GROUP BY field_name
-        ORDER BY count DESC
-        LIMIT 10;
-    """
-    return execute_query_dict(query)
+    return get_all_dashboard_stats().get('papers_by_field') or {}
 
 
-@st.cache_data(ttl=300)
 def get_papers_by_subfield():
     """Get papers count grouped by subfield."""
-    query = """
-        SELECT 
-            subfield_name,
-            COUNT(*) as count
-        FROM papers
-        WHERE subfield_name IS NOT NULL
-        GROUP BY subfield_name
-        ORDER BY count DESC
-        LIMIT 10;
-    """
-    return execute_query_dict(query)
+    return get_all_dashboard_stats().get('papers_by_subfield') or {}
 
 
-@st.cache_data(ttl=300)
 def get_open_access_stats():
     """Get open access statistics."""
-    query = """
-        SELECT 
-            oa_status,
-            COUNT(*) as count,
-            ROUND(100.0 * COUNT(*) / (SELECT COUNT(*) FROM papers WHERE oa_status IS NOT NULL), 2) as percentage
-        FROM papers
-        WHERE oa_status IS NOT NULL
-        GROUP BY oa_status
-        ORDER BY count DESC;
-    """
-    return execute_query_dict(query)
+    return get_all_dashboard_stats().get('open_access_stats') or {}
 
 
-@st.cache_data(ttl=300)
 def get_citation_stats():
     """Get citation statistics."""
-    query = """
-        SELECT 
-            COUNT(*) as total_papers,
-            AVG(cited_by_count) as avg_citations,
-            MAX(cited_by_count) as max_citations,
-            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY cited_by_count) as median_citations,
-            COUNT(CASE WHEN is_top_10_percent THEN 1 END) as top_10_percent_count,
-            COUNT(CASE WHEN is_top_1_percent THEN 1 END) as top_1_percent_count
-        FROM papers
-        WHERE cited_by_count IS NOT NULL;
-    """
-    result = execute_query_dict(query)
-    return result[0] if result else {}
+    return get_all_dashboard_stats().get('citation_stats') or {}
 
 
-@st.cache_data(ttl=300)
 def get_top_papers(limit=10):
     """Get top papers by citation count."""
-    query = """
-        SELECT 
-            title,
-            publication_year,
-            cited_by_count,
-            field_name,
-            subfield_name,
-            oa_status,
-            citation_percentile
-        FROM papers
-        WHERE cited_by_count IS NOT NULL
-        ORDER BY cited_by_count DESC
-        LIMIT %s;
-    """
-    return execute_query_dict(query, params=(limit,))
+    return get_all_dashboard_stats(top_papers_limit=limit).get('top_papers') or {}
 
 
-@st.cache_data(ttl=300)
 def get_collaboration_stats():
     """Get collaboration statistics."""
-    query = """
-        SELECT 
-            AVG(countries_count) as avg_countries,
-            AVG(institutions_count) as avg_institutions,
-            MAX(countries_count) as max_countries,
-            MAX(institutions_count) as max_institutions
-        FROM papers
-        WHERE countries_count IS NOT NULL OR institutions_count IS NOT NULL;
-    """
-    result = execute_query_dict(query)
-    return result[0] if result else {}
+    return get_all_dashboard_stats().get('collaboration_stats') or {}
+
+
+# Figure builders are cached separately from the data: every widget interaction
+# reruns the script, and rebuilding the Plotly figure spec is the expensive part
+# of a rerun once the stats themselves come from cache. The DataFrame argument
+# is hashed by content, so a figure is rebuilt only when its data changes.
+@st.cache_data(ttl=300)
+def _fig_year(df_year):
+    """Build the papers-by-year bar chart."""
+    fig_year = px.bar(
+        df_year,
+        x='publication_year',
+        y='count',
+        title='Number of Papers Published by Year',
+        labels={'publication_year': 'Year', 'count': 'Number of Papers'},
+        color='count',
+        color_continuous_scale='Blues'
+    )
+    fig_year.update_layout(showlegend=False)
+    return fig_year
+
+
+@st.cache_data(ttl=300)
+def _fig_field(df_field):
+    """Build the papers-by-field pie chart."""
+    return px.pie(
+        df_field,
+        values='count',
+        names='field_name',
+        title='Papers by Field'
+    )
 
 
 @st.cache_data(ttl=300)
+def _fig_subfield(df_subfield):
+    """Build the top subfields horizontal bar chart."""
+    fig_subfield = px.bar(
+        df_subfield,
+        x='count',
+        y='subfield_name',
+        orientation='h',
+        title='Top 10 Subfields by Paper Count',
+        labels={'count': 'Number of Papers', 'subfield_name': 'Subfield'},
+        color='count',
+        color_continuous_scale='Greens'
+    )
+    fig_subfield.update_layout(showlegend=False, yaxis={'categoryorder': 'total ascending'})
+    return fig_subfield
+
+
+@st.cache_data(ttl=300)
+def _fig_oa(df_oa):
+    """Build the open access status pie chart."""
+    return px.pie(
+        df_oa,
+        values='count',
+        names='oa_status',
+        title='Open Access Status Distribution',
+        color_discrete_map={
+            'gold': '#FFD700',
+            'bronze': '#CD7F32',
+            'green': '#90EE90',
+            'hybrid': '#9370DB',
+            'closed': '#808080'
+        }
+    )
+
+
 def get_fwci_stats():
     """Get Field-Weighted Citation Impact statistics."""
-    query = """
-        SELECT 
-            AVG(fwci) as avg_fwci,
-            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY fwci) as median_fwci,
-            MAX(fwci) as max_fwci
-        FROM papers
-        WHERE fwci IS NOT NULL;
-    """
-    result = execute_query_dict(query)
-    return result[0] if result else {}
+    return get_all_dashboard_stats().get('fwci_stats') or {}
 
 
 def main():
@@ -188,10 +277,9 @@ def main():
     # Header
     st.markdown('<h1 class="main-header">📊 Research Papers Dashboard</h1>', unsafe_allow_html=True)
     
-    # Test database connection
+    # Open (or reuse) the database connection pool
     try:
-        with DatabaseConnection.get_cursor() as cur:
-            cur.execute("SELECT 1;")
+        get_connection_pool()
     except Exception as e:
         st.error(f"❌ Database connection failed: {e}")
         st.info("Please ensure your .env file contains the DB_PASSWORD variable.")
@@ -200,8 +288,16 @@ def main():
     # Sidebar filters
     st.sidebar.header("🔍 Filters")
     
+    # Load every section in one round-trip, then slice it per render block
+    try:
+        stats = get_all_dashboard_stats(top_papers_limit=20)
+    except Exception as e:
+        st.error(f"❌ Failed to load dashboard statistics: {e}")
+        st.info("Please run create_dashboard_mviews.py (or the pipeline) to build the dashboard views.")
+        return
+    
     # Get total papers for context
-    total_papers = get_total_papers()
+    total_papers = stats.get('total_papers', 0)
     st.sidebar.metric("Total Papers", f"{total_papers:,}")
     
     # Main content
@@ -213,7 +309,7 @@ def main():
     st.header("📈 Key Metrics")
     col1, col2, col3, col4 = st.columns(4)
     
-    citation_stats = get_citation_stats()
+    citation_stats = stats.get('citation_stats') or {}
     with col1:
         st.metric(
             "Average Citations",
@@ -241,77 +337,37 @@ def main():
     
     # Papers by Year
     st.header("📅 Papers by Publication Year")
-    papers_by_year = get_papers_by_year()
-    if papers_by_year:
+    papers_by_year = stats.get('papers_by_year') or {}
+    if papers_by_year.get('count'):
         df_year = pd.DataFrame(papers_by_year)
-        fig_year = px.bar(
-            df_year,
-            x='publication_year',
-            y='count',
-            title='Number of Papers Published by Year',
-            labels={'publication_year': 'Year', 'count': 'Number of Papers'},
-            color='count',
-            color_continuous_scale='Blues'
-        )
-        fig_year.update_layout(showlegend=False)
-        st.plotly_chart(fig_year, use_container_width=True)
+        st.plotly_chart(_fig_year(df_year), use_container_width=True)
     
     # Two-column layout for field/subfield
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("🔬 Top Fields")
-        papers_by_field = get_papers_by_field()
-        if papers_by_field:
+        papers_by_field = stats.get('papers_by_field') or {}
+        if papers_by_field.get('count'):
             df_field = pd.DataFrame(papers_by_field)
-            fig_field = px.pie(
-                df_field,
-                values='count',
-                names='field_name',
-                title='Papers by Field'
-            )
-            st.plotly_chart(fig_field, use_container_width=True)
+            st.plotly_chart(_fig_field(df_field), use_container_width=True)
     
     with col2:
         st.subheader("🧪 Top Subfields")
-        papers_by_subfield = get_papers_by_subfield()
-        if papers_by_subfield:
+        papers_by_subfield = stats.get('papers_by_subfield') or {}
+        if papers_by_subfield.get('count'):
             df_subfield = pd.DataFrame(papers_by_subfield)
-            fig_subfield = px.bar(
-                df_subfield,
-                x='count',
-                y='subfield_name',
-                orientation='h',
-                title='Top 10 Subfields by Paper Count',
-                labels={'count': 'Number of Papers', 'subfield_name': 'Subfield'},
-                color='count',
-                color_continuous_scale='Greens'
-            )
-            fig_subfield.update_layout(showlegend=False, yaxis={'categoryorder': 'total ascending'})
-            st.plotly_chart(fig_subfield, use_container_width=True)
+            st.plotly_chart(_fig_subfield(df_subfield), use_container_width=True)
     
     # Open Access Statistics
     st.header("🔓 Open Access Statistics")
-    oa_stats = get_open_access_stats()
-    if oa_stats:
+    oa_stats = stats.get('open_access_stats') or {}
+    if oa_stats.get('count'):
         col1, col2 = st.columns(2)
         
         with col1:
             df_oa = pd.DataFrame(oa_stats)
-            fig_oa = px.pie(
-                df_oa,
-                values='count',
-                names='oa_status',
-                title='Open Access Status Distribution',
-                color_discrete_map={
-                    'gold': '#FFD700',
-                    'bronze': '#CD7F32',
-                    'green': '#90EE90',
-                    'hybrid': '#9370DB',
-                    'closed': '#808080'
-                }
-            )
-            st.plotly_chart(fig_oa, use_container_width=True)
+            st.plotly_chart(_fig_oa(df_oa), use_container_width=True)
         
         with col2:
             st.dataframe(
@@ -325,7 +381,6 @@ def main():
     
     # Citation Analysis
     st.header("📊 Citation Analysis")
-    citation_stats = get_citation_stats()
     if citation_stats:
         col1, col2, col3 = st.columns(3)
         
@@ -335,7 +390,7 @@ def main():
                 f"{citation_stats.get('max_citations', 0):,}" if citation_stats.get('max_citations') else "N/A"
             )
         
-        fwci_stats = get_fwci_stats()
+        fwci_stats = stats.get('fwci_stats') or {}
         with col2:
             st.metric(
                 "Average FWCI",
@@ -350,17 +405,13 @@ def main():
     
     # Top Papers
     st.header("🏆 Top Papers by Citations")
-    top_papers = get_top_papers(limit=20)
-    if top_papers:
+    top_papers = stats.get('top_papers') or {}
+    if top_papers.get('title'):
         df_top = pd.DataFrame(top_papers)
-        # Truncate long titles for display
-        df_top['title_display'] = df_top['title'].apply(
-            lambda x: x[:80] + '...' if len(x) > 80 else x
-        )
         
         st.dataframe(
-            df_top[['title_display', 'publication_year', 'cited_by_count', 'field_name', 'oa_status']].rename(columns={
-                'title_display': 'Title',
+            df_top[['title', 'publication_year', 'cited_by_count', 'field_name', 'oa_status']].rename(columns={
+                'title': 'Title',
                 'publication_year': 'Year',
                 'cited_by_count': 'Citations',
                 'field_name': 'Field',
@@ -372,7 +423,7 @@ def main():
     
     # Collaboration Metrics
     st.header("🤝 Collaboration Metrics")
-    collab_stats = get_collaboration_stats()
+    collab_stats = stats.get('collaboration_stats') or {}
     if collab_stats:
         col1, col2, col3, col4 = st.columns(4)
         
@@ -10,292 +10,265 @@ This script runs essential data quality tests:
 """
 
 import sys
-from typing import Dict, List, Any
+from collections import namedtuple
 from db_connection import DatabaseConnection
+from create_papers_table import VALIDATE_PAPERS_VERSION
+
+
+# One validation check: column is the validate_papers() output column holding its count
+TestSpec = namedtuple('TestSpec', ['section', 'name', 'description', 'column', 'expect_zero'])
+
+# Outcome of one check; count is None and error is set when the check could not run.
+# Status strings are only built when printing (see print_results).
+TestResult = namedtuple('TestResult', ['name', 'description', 'count', 'passed', 'error'])
+
+# The check SQL lives server-side in the validate_papers() PL/pgSQL function defined
+# in validate_papers.sql. The table setup (create_papers_table.py, pipeline.py or
+# load_papers_from_json.py) installs it and stores the file's hash as the function's
+# comment; the validator only reads, and refuses a stale definition.
+
+# Every check, in report order
+VALIDATION_TESTS = (
+    TestSpec("TEST 1: Missing Required Fields",
+             "Missing openalex_id",
+             "Papers with NULL or empty openalex_id (required field)",
+             "missing_openalex_id",
+             True),
+    TestSpec("TEST 1: Missing Required Fields",
+             "Missing title",
+             "Papers with NULL or empty title (required field)",
+             "missing_title",
+             True),
+    TestSpec("TEST 2: Citation Count Validation",
+             "Negative cited_by_count",
+             "Papers with negative cited_by_count (should be >= 0)",
+             "negative_cited_by_count",
+             True),
+    TestSpec("TEST 2: Citation Count Validation",
+             "Negative countries_count",
+             "Papers with negative countries_count (should be >= 0)",
+             "negative_countries_count",
+             True),
+    TestSpec("TEST 2: Citation Count Validation",
+             "Negative institutions_count",
+             "Papers with negative institutions_count (should be >= 0)",
+             "negative_institutions_count",
+             True),
+    TestSpec("TEST 3: Score Range Validation",
+             "Invalid citation_percentile range",
+             "Papers with citation_percentile outside valid range [0.0, 1.0]",
+             "invalid_citation_percentile",
+             True),
+    TestSpec("TEST 3: Score Range Validation",
+             "Invalid primary_topic_score range",
+             "Papers with primary_topic_score outside valid range [0.0, 1.0]",
+             "invalid_primary_topic_score",
+             True),
+    TestSpec("TEST 3: Score Range Validation",
+             "Negative fwci",
+             "Papers with negative fwci (Field-Weighted Citation Impact)",
+             "negative_fwci",
+             True),
+    TestSpec("TEST 4: Duplicate Detection",
+             "Duplicate openalex_id",
+             "Rows repeating an openalex_id already seen (should be 0)",
+             "duplicate_openalex_id",
+             True),
+    TestSpec("TEST 4: Duplicate Detection",
+             "Duplicate DOI",
+             "Rows repeating a DOI already seen (informational)",
+             "duplicate_doi",
+             True),
+)
+
+# Built once at import: column 0 is the total row count, column i + 1 the count for
+# VALIDATION_TESTS[i], so results can be read positionally
+_BATCH_QUERY = (
+    "SELECT total_papers, "
+    + ", ".join(spec.column for spec in VALIDATION_TESTS)
+    + " FROM validate_papers();"
+)
 
 
 class PapersDataValidator:
     """Validates data quality in the papers table."""
     
+    TESTS = VALIDATION_TESTS
+    
     def __init__(self):
         self.results = []
-        self.total_tests = 0
-        self.passed_tests = 0
-        self.failed_tests = 0
+        # Report lines waiting to be written; stays empty when stdout is a terminal
+        self._out = []
+        self._live = sys.stdout.isatty()
+    
+    @property
+    def total_tests(self) -> int:
+        return len(self.results)
+    
+    @property
+    def passed_tests(self) -> int:
+        return sum(1 for result in self.results if result.passed)
     
-    def run_test(self, test_name: str, query: str, description: str, 
-                 expect_zero: bool = True) -> Dict[str, Any]:
+    @property
+    def failed_tests(self) -> int:
+        return self.total_tests - self.passed_tests
+    
+    def _print(self, line: str = ""):
         """
-        Run a single test query.
+        Print a report line.
+        
+        On a terminal the line is printed immediately so progress is visible.
+        Otherwise (CI logs, pipes) lines are buffered and written in one call by
+        flush_output, instead of one write per line.
+        """
+        if self._live:
+            print(line)
+        else:
+            self._out.append(line)
+    
+    def flush_output(self):
+        """Write any buffered report lines to stdout."""
+        if self._out:
+            sys.stdout.write("\n".join(self._out) + "\n")
+            sys.stdout.flush()
+            self._out.clear()
+    
+    def record_result(self, test_name: str, description: str, count: int,
+                      expect_zero: bool = True) -> TestResult:
+        """
+        Record the outcome of a test from its count.
         
         Args:
             test_name: Name of the test
-            query: SQL query to execute
             description: Human-readable description
-            expect_zero: If True, test passes when result is 0. If False, test passes when result > 0.
+            count: Value returned by the test query
+            expect_zero: If True, test passes when count is 0. If False, test passes when count > 0.
         
         Returns:
-            Dictionary with test results
+            TestResult for the test
         """
-        self.total_tests += 1
-        
-        try:
-            with DatabaseConnection.get_cursor(dict_cursor=True) as cur:
-                cur.execute(query)
-                result = cur.fetchone()
-                
-                # Get the first value from the result (count or similar)
-                count = list(result.values())[0] if result else 0
-                
-                # Determine if test passed
-                passed = (count == 0) if expect_zero else (count > 0)
-                
-                if passed:
-                    self.passed_tests += 1
-                    status = "✓ PASS"
-                else:
-                    self.failed_tests += 1
-                    status = "✗ FAIL"
-                
-                test_result = {
-                    'name': test_name,
-                    'status': status,
-                    'description': description,
-                    'count': count,
-                    'passed': passed
-                }
-                
-                self.results.append(test_result)
-                return test_result
-                
-        except Exception as e:
-            self.failed_tests += 1
-            test_result = {
-                'name': test_name,
-                'status': '✗ ERROR',
-                'description': description,
-                'error': str(e),
-                'passed': False
-            }
-            self.results.append(test_result)
-            return test_result
-    
-    def test_missing_required_fields(self):
-        """Test 1: Missing Required Fields"""
-        print("\n" + "=" * 70)
-        print("TEST 1: Missing Required Fields")
-        print("=" * 70)
-        
-        # Test for NULL openalex_id
-        self.run_test(
-            test_name="Missing openalex_id",
-            query="""
-                SELECT COUNT(*) as count
-                FROM papers
-                WHERE openalex_id IS NULL OR openalex_id = '';
-            """,
-            description="Papers with NULL or empty openalex_id (required field)"
-        )
-        
-        # Test for NULL title
-        self.run_test(
-            test_name="Missing title",
-            query="""
-                SELECT COUNT(*) as count
-                FROM papers
-                WHERE title IS NULL OR title = '';
-            """,
-            description="Papers with NULL or empty title (required field)"
-        )
+        # Determine if test passed
+        passed = (count == 0) if expect_zero else (count > 0)
+        test_result = TestResult(test_name, description, count, passed, None)
+        self.results.append(test_result)
+        return test_result
     
-    def test_citation_count_validation(self):
-        """Test 2: Citation Count Validation"""
-        print("\n" + "=" * 70)
-        print("TEST 2: Citation Count Validation")
-        print("=" * 70)
-        
-        # Test for negative cited_by_count
-        self.run_test(
-            test_name="Negative cited_by_count",
-            query="""
-                SELECT COUNT(*) as count
-                FROM papers
-                WHERE cited_by_count < 0;
-            """,
-            description="Papers with negative cited_by_count (should be >= 0)"
-        )
-        
-        # Test for negative countries_count
-        self.run_test(
-            test_name="Negative countries_count",
-            query="""
-                SELECT COUNT(*) as count
-                FROM papers
-                WHERE countries_count < 0;
-            """,
-            description="Papers with negative countries_count (should be >= 0)"
-        )
-        
-        # Test for negative institutions_count
-        self.run_test(
-            test_name="Negative institutions_count",
-            query="""
-                SELECT COUNT(*) as count
-                FROM papers
-                WHERE institutions_count < 0;
-            """,
-            description="Papers with negative institutions_count (should be >= 0)"
-        )
+    def record_error(self, test_name: str, description: str, error: Exception) -> TestResult:
+        """Record a test that could not be run."""
+        test_result = TestResult(test_name, description, None, False, str(error))
+        self.results.append(test_result)
+        return test_result
     
-    def test_score_range_validation(self):
-        """Test 3: Score Range Validation"""
-        print("\n" + "=" * 70)
-        print("TEST 3: Score Range Validation")
-        print("=" * 70)
-        
-        # Test citation_percentile range (should be 0.0 to 1.0)
-        self.run_test(
-            test_name="Invalid citation_percentile range",
-            query="""
-                SELECT COUNT(*) as count
-                FROM papers
-                WHERE citation_percentile IS NOT NULL
-                  AND (citation_percentile < 0.0 OR citation_percentile > 1.0);
-            """,
-            description="Papers with citation_percentile outside valid range [0.0, 1.0]"
-        )
+    def run_validation_tests(self, cur):
+        """
+        Run every check in TESTS with a single call to validate_papers().
         
-        # Test primary_topic_score range (should be 0.0 to 1.0)
-        self.run_test(
-            test_name="Invalid primary_topic_score range",
-            query="""
-                SELECT COUNT(*) as count
-                FROM papers
-                WHERE primary_topic_score IS NOT NULL
-                  AND (primary_topic_score < 0.0 OR primary_topic_score > 1.0);
-            """,
-            description="Papers with primary_topic_score outside valid range [0.0, 1.0]"
-        )
+        The function also returns the total row count, which is printed first.
         
-        # Test fwci range (should be >= 0, no upper bound specified)
-        self.run_test(
-            test_name="Negative fwci",
-            query="""
-                SELECT COUNT(*) as count
-                FROM papers
-                WHERE fwci IS NOT NULL AND fwci < 0;
-            """,
-            description="Papers with negative fwci (Field-Weighted Citation Impact)"
-        )
-    
-    def test_duplicate_detection(self):
-        """Test 4: Duplicate Detection"""
-        print("\n" + "=" * 70)
-        print("TEST 4: Duplicate Detection")
-        print("=" * 70)
+        Args:
+            cur: Cursor to run the query on
+        """
+        try:
+            # PL/pgSQL caches the plan of the check query for the session
+            cur.execute(_BATCH_QUERY)
+            row = cur.fetchone()
+        except Exception as e:
+            for spec in self.TESTS:
+                self.record_error(spec.name, spec.description, e)
+            return
         
-        # Test for duplicate openalex_id (should be unique)
-        self.run_test(
-            test_name="Duplicate openalex_id",
-            query="""
-                SELECT COUNT(*) as count
-                FROM (
-                    SELECT openalex_id, COUNT(*) as cnt
-                    FROM papers
-                    WHERE openalex_id IS NOT NULL
-                    GROUP BY openalex_id
-                    HAVING COUNT(*) > 1
-                ) as duplicates;
-            """,
-            description="Number of openalex_id values that appear more than once (should be 0)"
-        )
+        self._print(f"\nTotal records in papers table: {row[0]:,}")
         
-        # Test for duplicate DOI (informational - DOIs should ideally be unique)
-        self.run_test(
-            test_name="Duplicate DOI",
-            query="""
-                SELECT COUNT(*) as count
-                FROM (
-                    SELECT doi, COUNT(*) as cnt
-                    FROM papers
-                    WHERE doi IS NOT NULL AND doi != ''
-                    GROUP BY doi
-                    HAVING COUNT(*) > 1
-                ) as duplicates;
-            """,
-            description="Number of DOI values that appear more than once (informational)"
-        )
+        section = None
+        for spec, count in zip(self.TESTS, row[1:]):
+            if spec.section != section:
+                section = spec.section
+                self._print("\n" + "=" * 70)
+                self._print(section)
+                self._print("=" * 70)
+            
+            self.record_result(spec.name, spec.description, count, spec.expect_zero)
     
     def print_results(self):
         """Print formatted test results."""
-        print("\n" + "=" * 70)
-        print("TEST RESULTS SUMMARY")
-        print("=" * 70)
+        self._print("\n" + "=" * 70)
+        self._print("TEST RESULTS SUMMARY")
+        self._print("=" * 70)
         
         for result in self.results:
-            print(f"\n{result['status']} - {result['name']}")
-            print(f"  {result['description']}")
+            if result.passed:
+                status = "✓ PASS"
+            else:
+                status = "✗ ERROR" if result.error else "✗ FAIL"
+            self._print(f"\n{status} - {result.name}")
+            self._print(f"  {result.description}")
             
-            if 'error' in result:
-                print(f"  Error: {result['error']}")
+            if result.error:
+                self._print(f"  Error: {result.error}")
             else:
-                if result['name'] == 'Duplicate DOI':
+                if result.name == 'Duplicate DOI':
                     # For DOI duplicates, show it's informational
-                    print(f"  Found: {result['count']} duplicate DOI(s) (informational)")
+                    self._print(f"  Found: {result.count} duplicate DOI row(s) (informational)")
                 else:
-                    print(f"  Found: {result['count']} record(s)")
+                    self._print(f"  Found: {result.count} record(s)")
         
-        print("\n" + "-" * 70)
-        print(f"Total Tests: {self.total_tests}")
-        print(f"Passed: {self.passed_tests}")
-        print(f"Failed: {self.failed_tests}")
-        print("-" * 70)
+        self._print("\n" + "-" * 70)
+        self._print(f"Total Tests: {self.total_tests}")
+        self._print(f"Passed: {self.passed_tests}")
+        self._print(f"Failed: {self.failed_tests}")
+        self._print("-" * 70)
         
         if self.failed_tests == 0:
-            print("\n✓ All tests passed!")
-            return 0
+            self._print("\n✓ All tests passed!")
+            exit_code = 0
         else:
-            print(f"\n✗ {self.failed_tests} test(s) failed. Please review the results above.")
-            return 1
+            self._print(f"\n✗ {self.failed_tests} test(s) failed. Please review the results above.")
+            exit_code = 1
+        
+        self.flush_output()
+        return exit_code
     
     def run_all_tests(self):
         """Run all validation tests."""
-        print("=" * 70)
-        print("PAPERS TABLE DATA VALIDATION TESTS")
-        print("=" * 70)
+        self._print("=" * 70)
+        self._print("PAPERS TABLE DATA VALIDATION TESTS")
+        self._print("=" * 70)
         
-        # Check if table exists
+        # One autocommit connection for the preflight checks and the test batch
         try:
-            with DatabaseConnection.get_cursor() as cur:
-                cur.execute("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.tables 
-                        WHERE table_schema = 'public' 
-                        AND table_name = 'papers'
-                    );
-                """)
-                table_exists = cur.fetchone()[0]
+            with DatabaseConnection.get_session() as (conn, cur):
+                # Check if table exists (catalog lookup; NULL instead of an error when missing)
+                # and read the installed validate_papers() version in the same round-trip.
+                # This has to be its own query: a statement that references a missing table
+                # fails at parse time, so it cannot be folded into the test batch.
+                cur.execute(
+                    "SELECT to_regclass('public.papers') IS NOT NULL, "
+                    "obj_description(to_regprocedure('validate_papers()'), 'pg_proc');"
+                )
+                table_exists, installed_version = cur.fetchone()
                 
                 if not table_exists:
-                    print("\n✗ ERROR: 'papers' table does not exist in the database.")
-                    print("Please create the table first using schema.sql or load_papers_from_json.py")
+                    self._print("\n✗ ERROR: 'papers' table does not exist in the database.")
+                    self._print("Please create the table first using schema.sql or load_papers_from_json.py")
+                    self.flush_output()
                     return 1
                 
-                # Get total record count
-                cur.execute("SELECT COUNT(*) FROM papers;")
-                total_count = cur.fetchone()[0]
-                print(f"\nTotal records in papers table: {total_count:,}")
+                if installed_version != VALIDATE_PAPERS_VERSION:
+                    state = "not installed (or unversioned)" if installed_version is None else "out of date"
+                    self._print(f"\n✗ ERROR: validate_papers() is {state} "
+                                "(it must match validate_papers.sql).")
+                    self._print("Run `python create_papers_table.py` (or a load) to install the current definition.")
+                    self.flush_output()
+                    return 1
                 
+                # Total record count and all tests (one round-trip)
+                self.run_validation_tests(cur)
+        
         except Exception as e:
-            print(f"\n✗ ERROR: Could not connect to database or check table: {e}")
+            self._print(f"\n✗ ERROR: Could not connect to database or check table: {e}")
+            self.flush_output()
             return 1
         
-        # Run all tests
-        self.test_missing_required_fields()
-        self.test_citation_count_validation()
-        self.test_score_range_validation()
-        self.test_duplicate_detection()
-        
         # Print summary
         return self.print_results()
 
@@ -308,9 +281,12 @@ def main():
         exit_code = validator.run_all_tests()
         sys.exit(exit_code)
     except KeyboardInterrupt:
+        # Keep whatever was reported before the interrupt
+        validator.flush_output()
         print("\n\nTest execution interrupted by user.")
         sys.exit(1)
     except Exception as e:
+        validator.flush_output()
         print(f"\n✗ Unexpected error: {e}")
         import traceback
         traceback.print_exc()
@@ -10,7 +10,15 @@ This module provides:
 """
 
 import os
-from typing import Optional
+import re
+import io
+import atexit
+import hashlib
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
 from contextlib import contextmanager
 from dotenv import load_dotenv
 
@@ -18,7 +26,7 @@ try:
     import psycopg2
     from psycopg2 import pool, sql
     from psycopg2.extensions import connection, cursor
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.extras import NamedTupleCursor, RealDictCursor
 except ImportError:
     raise ImportError(
         "psycopg2 is required. Install it with: pip install psycopg2-binary"
@@ -28,11 +36,114 @@ except ImportError:
 # Load environment variables
 load_dotenv()
 
+# Planner settings for Neon's SSD-backed storage: random reads cost about the same
+# as sequential ones, and JIT startup outweighs the gain on small dashboard queries.
+# effective_cache_size depends on the compute size, so it is only included when
+# DB_EFFECTIVE_CACHE_SIZE is set (e.g. "4GB").
+PLANNER_SETTINGS = {
+    'random_page_cost': '1.1',
+    'jit': 'off',
+}
+if os.getenv('DB_EFFECTIVE_CACHE_SIZE'):
+    PLANNER_SETTINGS['effective_cache_size'] = os.getenv('DB_EFFECTIVE_CACHE_SIZE')
+
+
+@lru_cache(maxsize=128)
+def build_prepared_statement(query: str) -> Tuple[str, str, str]:
+    """
+    Translate a %s-style query into server-side PREPARE/EXECUTE statements.
+    
+    Args:
+        query: SQL query string using %s placeholders
+    
+    Returns:
+        Tuple of (statement name, PREPARE sql, EXECUTE sql). The EXECUTE sql keeps
+        %s placeholders so parameters are still passed through psycopg2.
+    """
+    statement = query.strip().rstrip(';')
+    name = "stmt_" + hashlib.md5(statement.encode('utf-8')).hexdigest()[:16]
+    
+    param_count = 0
+    
+    def _numbered(_match):
+        nonlocal param_count
+        param_count += 1
+        return f"${param_count}"
+    
+    prepare_sql = f"PREPARE {name} AS {re.sub(r'%s', _numbered, statement)}"
+    if param_count:
+        execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * param_count)})"
+    else:
+        execute_sql = f"EXECUTE {name}"
+    
+    return name, prepare_sql, execute_sql
+
+
+class ValidatingPool(pool.ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool that checks a connection is alive before handing it out.
+    
+    Connections whose socket is already closed are dropped without any SQL. A
+    connection that has sat idle for longer than validate_after seconds is pinged
+    with SELECT 1 first, so a session dropped by the server's idle timeout fails
+    here and is replaced, instead of failing the caller's first query. Connections
+    checked out again within validate_after seconds are returned as-is.
+    """
+    
+    def __init__(self, minconn: int, maxconn: int, *args, validate_after: float = 0.5, **kwargs):
+        self.validate_after = validate_after
+        # id(connection) -> time.monotonic() when it was last returned to the pool
+        self._last_used: Dict[int, float] = {}
+        super().__init__(minconn, maxconn, *args, **kwargs)
+    
+    def _is_alive(self, conn: connection) -> bool:
+        """Return True if conn can be handed out."""
+        if conn.closed:
+            return False
+        
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used <= self.validate_after:
+            return True
+        
+        try:
+            # Autocommit so the ping does not leave a transaction open (and needs
+            # no ROLLBACK round-trip); toggling it does not touch the server
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1;")
+            finally:
+                conn.autocommit = False
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+    
+    def getconn(self, key=None) -> connection:
+        """Get a live connection, replacing any that have gone away while idle."""
+        while True:
+            conn = super().getconn(key)
+            if self._is_alive(conn):
+                return conn
+            
+            # Dead connection: drop it and its bookkeeping, then try again
+            self._last_used.pop(id(conn), None)
+            super().putconn(conn, key, close=True)
+    
+    def putconn(self, conn: connection, key=None, close: bool = False):
+        """Return a connection to the pool and record when it was last used."""
+        if close or conn.closed:
+            self._last_used.pop(id(conn), None)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+        super().putconn(conn, key, close)
+
 
 class DatabaseConnection:
     """Database connection manager with pooling support."""
     
-    _connection_pool: Optional[pool.ThreadedConnectionPool] = None
+    _connection_pool: Optional[ValidatingPool] = None
+    # Guards lazy pool creation so concurrent first callers share one pool
+    _pool_lock = threading.Lock()
     _connection_string: Optional[str] = None
     
     @classmethod
@@ -65,18 +176,37 @@ class DatabaseConnection:
         Returns:
             psycopg2 connection object
         """
-        connection_string = cls.get_connection_string()
-        
         if use_pool:
-            if cls._connection_pool is None:
-                cls._connection_pool = pool.ThreadedConnectionPool(
-                    minconn=1,
-                    maxconn=10,
-                    dsn=connection_string
-                )
-            return cls._connection_pool.getconn()
+            return cls.get_pool().getconn()
         else:
-            return psycopg2.connect(connection_string)
+            return psycopg2.connect(cls.get_connection_string())
+    
+    @classmethod
+    def get_pool(cls) -> ValidatingPool:
+        """
+        Get the shared connection pool, creating it on first use.
+        
+        The pool lives for the whole process, so repeated callers (e.g. Streamlit
+        reruns) reuse warm connections instead of paying TCP/TLS/auth setup again.
+        Its size comes from DB_POOL_MIN / DB_POOL_MAX (default 2 / 10); a small
+        pool is plenty behind Neon's own connection pooler. Connections idle for
+        longer than DB_POOL_VALIDATE_AFTER seconds (default 0.5) are pinged before
+        reuse (see ValidatingPool).
+        
+        Returns:
+            ValidatingPool (a psycopg2 ThreadedConnectionPool)
+        """
+        if cls._connection_pool is None:
+            with cls._pool_lock:
+                # Re-check under the lock: another thread may have created it
+                if cls._connection_pool is None:
+                    cls._connection_pool = ValidatingPool(
+                        minconn=int(os.getenv('DB_POOL_MIN', '2')),
+                        maxconn=int(os.getenv('DB_POOL_MAX', '10')),
+                        validate_after=float(os.getenv('DB_POOL_VALIDATE_AFTER', '0.5')),
+                        dsn=cls.get_connection_string()
+                    )
+        return cls._connection_pool
     
     @classmethod
     def return_connection(cls, conn: connection, from_pool: bool = True):
@@ -99,19 +229,34 @@ class DatabaseConnection:
     @classmethod
     def close_all_connections(cls):
         """Close all connections in the pool."""
-        if cls._connection_pool:
-            cls._connection_pool.closeall()
-            cls._connection_pool = None
+        with cls._pool_lock:
+            if cls._connection_pool:
+                cls._connection_pool.closeall()
+                cls._connection_pool = None
+    
+    @staticmethod
+    def get_cursor_class(dict_cursor: bool = False, namedtuple_cursor: bool = False):
+        """Return the psycopg2 cursor class for the requested row type."""
+        if dict_cursor:
+            return RealDictCursor
+        if namedtuple_cursor:
+            return NamedTupleCursor
+        return cursor
     
     @classmethod
     @contextmanager
-    def get_cursor(cls, use_pool: bool = True, dict_cursor: bool = False):
+    def get_cursor(cls, use_pool: bool = True, dict_cursor: bool = False,
+                   namedtuple_cursor: bool = False, readonly: bool = False):
         """
         Context manager for database cursor.
         
         Args:
             use_pool: If True, use connection pool. If False, create a new connection.
             dict_cursor: If True, use RealDictCursor (returns dict-like rows).
+            namedtuple_cursor: If True, use NamedTupleCursor (rows are namedtuples of a
+                class built once per query; much lighter than a dict per row).
+            readonly: If True, run in autocommit so no BEGIN/COMMIT round-trips are
+                sent around the queries. Use only for blocks that just read.
         
         Yields:
             psycopg2 cursor object
@@ -122,19 +267,74 @@ class DatabaseConnection:
                 results = cur.fetchall()
         """
         conn = cls.get_connection(use_pool=use_pool)
+        if readonly:
+            # Client-side switch only (no set_session(readonly=True): in autocommit
+            # that becomes a session default leaking through the transaction pooler)
+            conn.autocommit = True
         try:
-            cursor_class = RealDictCursor if dict_cursor else cursor
+            cursor_class = cls.get_cursor_class(dict_cursor, namedtuple_cursor)
             cur = conn.cursor(cursor_factory=cursor_class)
             try:
                 yield cur
-                conn.commit()
+                if not conn.autocommit:
+                    conn.commit()
             except Exception:
-                conn.rollback()
+                if not conn.autocommit:
+                    conn.rollback()
                 raise
             finally:
                 cur.close()
         finally:
-            cls.return_connection(conn, from_pool=use_pool)
+            try:
+                # A dropped connection raises on any setter; the pool discards it anyway
+                if readonly and not conn.closed:
+                    conn.autocommit = False
+            finally:
+                cls.return_connection(conn, from_pool=use_pool)
+    
+    @classmethod
+    @contextmanager
+    def get_session(cls, use_pool: bool = True, dict_cursor: bool = False,
+                    namedtuple_cursor: bool = False):
+        """
+        Context manager for a read-only batch of queries on one connection.
+        
+        The connection is switched to autocommit, so each statement is its own
+        transaction and no COMMIT round-trip is needed between queries. Read-only
+        is by convention: it is not enforced with set_session(readonly=True),
+        which in autocommit mode sets a session default that would leak to other
+        clients through the transaction-mode pooler.
+        
+        Args:
+            use_pool: If True, use connection pool. If False, create a new connection.
+            dict_cursor: If True, use RealDictCursor (returns dict-like rows).
+            namedtuple_cursor: If True, use NamedTupleCursor (rows are namedtuples of a
+                class built once per query; much lighter than a dict per row).
+        
+        Yields:
+            Tuple of (psycopg2 connection, cursor)
+        
+        Example:
+            with DatabaseConnection.get_session() as (conn, cur):
+                cur.execute("SELECT COUNT(*) FROM papers;")
+                total = cur.fetchone()[0]
+        """
+        conn = cls.get_connection(use_pool=use_pool)
+        conn.autocommit = True
+        try:
+            cursor_class = cls.get_cursor_class(dict_cursor, namedtuple_cursor)
+            cur = conn.cursor(cursor_factory=cursor_class)
+            try:
+                yield conn, cur
+            finally:
+                cur.close()
+        finally:
+            try:
+                # A dropped connection raises on any setter; the pool discards it anyway
+                if not conn.closed:
+                    conn.autocommit = False
+            finally:
+                cls.return_connection(conn, from_pool=use_pool)
     
     @classmethod
     @contextmanager
@@ -162,9 +362,60 @@ class DatabaseConnection:
             cls.return_connection(conn, from_pool=use_pool)
 
 
+# Close pooled connections when the process exits
+atexit.register(DatabaseConnection.close_all_connections)
+
+
+# Rows fetched per network round-trip when streaming through a server-side cursor
+STREAM_ITERSIZE = 10000
+
+
+def stream_query(query: str, params: Optional[tuple] = None, use_pool: bool = True,
+                 dict_cursor: bool = False, namedtuple_cursor: bool = False) -> Iterator:
+    """
+    Iterate over a query's rows through a server-side (named) cursor.
+    
+    Rows arrive STREAM_ITERSIZE at a time, so memory stays bounded however large
+    the result is. The connection and its transaction stay open until the
+    generator is exhausted or closed; consume it fully (or close it) before
+    relying on the connection going back to the pool.
+    
+    Args:
+        query: SQL query string
+        params: Query parameters (for parameterized queries)
+        use_pool: If True, use connection pool.
+        dict_cursor: If True, yield dict-like rows.
+        namedtuple_cursor: If True, yield namedtuple rows.
+    
+    Yields:
+        One row at a time
+    """
+    with DatabaseConnection.get_connection_context(use_pool=use_pool) as conn:
+        try:
+            # Named cursors only live inside a transaction, so autocommit must be off
+            with conn.cursor(
+                name=f"stream_{uuid.uuid4().hex}",
+                cursor_factory=DatabaseConnection.get_cursor_class(dict_cursor, namedtuple_cursor)
+            ) as cur:
+                cur.itersize = STREAM_ITERSIZE
+                cur.execute(query, params)
+                yield from cur
+            conn.commit()
+        except BaseException:
+            # Includes GeneratorExit when the caller stops iterating early
+            conn.rollback()
+            raise
+
+
 # Convenience functions for common operations
+def is_select(query: str) -> bool:
+    """Return True if query is a plain SELECT (safe to run with readonly=True)."""
+    return query.lstrip().upper().startswith('SELECT')
+
+
 def execute_query(query: str, params: Optional[tuple] = None, 
-                 fetch: bool = True, use_pool: bool = True) -> Optional[list]:
+                 fetch: bool = True, use_pool: bool = True,
+                 namedtuple: bool = False, stream: bool = False):
     """
     Execute a query and return results.
     
@@ -173,14 +424,23 @@ def execute_query(query: str, params: Optional[tuple] = None,
         params: Query parameters (for parameterized queries)
         fetch: If True, fetch and return results. If False, just execute.
         use_pool: If True, use connection pool.
+        namedtuple: If True, return namedtuple rows (access by attribute, e.g. row.id).
+            Prefer this over execute_query_dict for large result sets.
+        stream: If True, return a generator over the rows backed by a server-side
+            cursor instead of a list (see stream_query). Implies fetch.
     
     Returns:
-        List of results if fetch=True, None otherwise
+        List of results if fetch=True, None otherwise (a generator if stream=True)
     
     Example:
         results = execute_query("SELECT * FROM users WHERE id = %s", (1,))
     """
-    with DatabaseConnection.get_cursor(use_pool=use_pool) as cur:
+    if stream:
+        return stream_query(query, params, use_pool=use_pool, namedtuple_cursor=namedtuple)
+    
+    readonly = fetch and is_select(query)
+    with DatabaseConnection.get_cursor(use_pool=use_pool, namedtuple_cursor=namedtuple,
+                                       readonly=readonly) as cur:
         cur.execute(query, params)
         if fetch:
             return cur.fetchall()
@@ -188,7 +448,7 @@ def execute_query(query: str, params: Optional[tuple] = None,
 
 
 def execute_query_dict(query: str, params: Optional[tuple] = None,
-                       use_pool: bool = True) -> list:
+                       use_pool: bool = True, stream: bool = False):
     """
     Execute a query and return results as dictionaries.
     
@@ -196,19 +456,86 @@ def execute_query_dict(query: str, params: Optional[tuple] = None,
         query: SQL query string
         params: Query parameters (for parameterized queries)
         use_pool: If True, use connection pool.
+        stream: If True, return a generator over the rows backed by a server-side
+            cursor instead of a list (see stream_query).
     
     Returns:
-        List of dictionaries (one per row)
+        List of dictionaries (one per row), or a generator of them if stream=True
     
     Example:
         results = execute_query_dict("SELECT * FROM users WHERE id = %s", (1,))
         # results[0]['column_name'] to access values
     """
-    with DatabaseConnection.get_cursor(use_pool=use_pool, dict_cursor=True) as cur:
+    if stream:
+        return stream_query(query, params, use_pool=use_pool, dict_cursor=True)
+    
+    with DatabaseConnection.get_cursor(use_pool=use_pool, dict_cursor=True,
+                                       readonly=is_select(query)) as cur:
         cur.execute(query, params)
         return cur.fetchall()
 
 
+def execute_copy(query: str, params: Optional[tuple] = None, use_pool: bool = True,
+                 binary: bool = False) -> bytes:
+    """
+    Run a query through COPY ... TO STDOUT and return the raw output.
+    
+    COPY streams rows in one pass without building a Python tuple per row, which
+    is much cheaper than fetchall() for large reads. Use execute_query for small
+    results.
+    
+    Args:
+        query: SQL SELECT query (without a trailing semicolon)
+        params: Query parameters (for parameterized queries). COPY cannot take
+            bind parameters, so they are inlined client-side with mogrify.
+        use_pool: If True, use connection pool.
+        binary: If True, use PostgreSQL's binary COPY format; otherwise CSV with a
+            header row.
+    
+    Returns:
+        COPY output as bytes
+    
+    Example:
+        data = execute_copy("SELECT openalex_id, cited_by_count FROM papers")
+    """
+    copy_format = "FORMAT binary" if binary else "FORMAT csv, HEADER"
+    
+    with DatabaseConnection.get_cursor(use_pool=use_pool) as cur:
+        if params:
+            query = cur.mogrify(query, params).decode(cur.connection.encoding)
+        buffer = io.BytesIO()
+        cur.copy_expert(f"COPY ({query.strip().rstrip(';')}) TO STDOUT WITH ({copy_format})", buffer)
+        return buffer.getvalue()
+
+
+def copy_to_dataframe(query: str, params: Optional[tuple] = None, use_pool: bool = True):
+    """
+    Run a query through COPY and load the result into a pandas DataFrame.
+    
+    The CSV stream is parsed by pandas' C reader straight into column arrays, so
+    large analytics reads skip per-row Python objects entirely.
+    
+    Args:
+        query: SQL SELECT query (without a trailing semicolon)
+        params: Query parameters (for parameterized queries)
+        use_pool: If True, use connection pool.
+    
+    Returns:
+        pandas DataFrame with one column per result column
+    
+    Example:
+        df = copy_to_dataframe("SELECT publication_year, fwci FROM papers WHERE fwci IS NOT NULL")
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError(
+            "pandas is required for copy_to_dataframe. Install it with: pip install pandas"
+        )
+    
+    return pd.read_csv(io.BytesIO(execute_copy(query, params, use_pool=use_pool)))
+
+
 def execute_many(query: str, params_list: list, use_pool: bool = True):
     """
     Execute a query multiple times with different parameters.
@@ -228,6 +555,24 @@ def execute_many(query: str, params_list: list, use_pool: bool = True):
         cur.executemany(query, params_list)
 
 
+def apply_planner_settings():
+    """
+    Persist PLANNER_SETTINGS as defaults for the current database role.
+    
+    The pooled endpoint runs in transaction mode, so a SET issued on connect would
+    only apply to whichever server session served that transaction. Role-level
+    defaults are applied by PostgreSQL to every new session instead, for every
+    client of the role, so this only runs when explicitly requested
+    (create_papers_table.py --planner-settings).
+    """
+    with DatabaseConnection.get_cursor() as cur:
+        for name, value in PLANNER_SETTINGS.items():
+            cur.execute(
+                sql.SQL("ALTER ROLE CURRENT_USER SET {} = %s;").format(sql.Identifier(name)),
+                (value,)
+            )
+
+
 def test_connection() -> bool:
     """
     Test database connection.
@@ -236,7 +581,7 @@ def test_connection() -> bool:
         True if connection successful, False otherwise
     """
     try:
-        with DatabaseConnection.get_cursor() as cur:
+        with DatabaseConnection.get_cursor(readonly=True) as cur:
             cur.execute("SELECT 1;")
             result = cur.fetchone()
             return result[0] == 1
@@ -252,7 +597,7 @@ def get_database_info() -> dict:
     Returns:
         Dictionary with database information
     """
-    with DatabaseConnection.get_cursor(dict_cursor=True) as cur:
+    with DatabaseConnection.get_cursor(dict_cursor=True, readonly=True) as cur:
         cur.execute("""
             SELECT 
                 current_database() as database,
@@ -11,12 +11,90 @@ This script:
 5. Saves all papers (with all fields) in a timestamped JSON file inside temp/ folder
 """
 
-import json
 import os
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pyalex import Works, Topics
 
+# orjson serializes several times faster than the standard library on large,
+# float/unicode-heavy dumps; fall back to json if it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
 
+
+# Resolved AI field/subfield IDs are cached here; they practically never change
+TOPIC_IDS_CACHE_FILE = os.path.join('temp', '.openalex_field_cache.json')
+TOPIC_IDS_CACHE_TTL = 30 * 86400  # seconds
+
+
+def _read_json(path):
+    """Read a small JSON file with orjson when available."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _write_json(path, data):
+    """Write a small JSON file with orjson when available."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        if orjson is not None:
+            f.write(orjson.dumps(data))
+        else:
+            f.write(json.dumps(data).encode('utf-8'))
+
+
+def cache_topic_ids(func):
+    """
+    Cache the (field_id, subfield_id) returned by func on disk for TOPIC_IDS_CACHE_TTL.
+    
+    A fresh cache skips the Topics search (one or two API calls) entirely. A
+    missing, stale or unreadable cache just runs func and rewrites the file.
+    The IDs are also kept in memory, so later calls in the same process (e.g.
+    from several pipeline instances) skip the file too. A lookup that found
+    neither ID is not cached, so the next run searches again.
+    """
+    # IDs already resolved in this process; arguments (e.g. self) don't affect them
+    resolved = []
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if resolved:
+            return resolved[0]
+        
+        try:
+            cache = _read_json(TOPIC_IDS_CACHE_FILE)
+            if time.time() - cache['ts'] < TOPIC_IDS_CACHE_TTL:
+                print(f"Using cached field/subfield IDs from {TOPIC_IDS_CACHE_FILE}")
+                resolved.append((cache['field_id'], cache['subfield_id']))
+                return resolved[0]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        field_id, subfield_id = func(*args, **kwargs)
+        if field_id is None and subfield_id is None:
+            return field_id, subfield_id
+        
+        resolved.append((field_id, subfield_id))
+        try:
+            _write_json(TOPIC_IDS_CACHE_FILE, {
+                'ts': time.time(),
+                'field_id': field_id,
+                'subfield_id': subfield_id,
+            })
+        except OSError as e:
+            print(f"  Note: could not cache field/subfield IDs: {e}")
+        return field_id, subfield_id
+    
+    return wrapper
+
+
+@cache_topic_ids
 def search_ai_field_subfield():
     """Search for 'artificial intelligence' as Field or Subfield in OpenAlex Topics."""
     print("Searching for 'artificial intelligence' as Field or Subfield...")
@@ -98,6 +176,31 @@ def search_ai_field_subfield():
     return field_id, subfield_id
 
 
+def fetch_pages(filters, label, per_page=200):
+    """
+    Fetch every page of a Works query using OpenAlex cursor pagination.
+    
+    Each response carries the cursor for the next page, so every page costs the
+    API the same however deep it is, and results are not capped at the 10,000
+    that page-number pagination can reach. Cursor pages are fetched in sequence.
+    
+    Args:
+        filters: Works filter arguments
+        label: Name used in progress messages (e.g. "field")
+        per_page: Results per page (OpenAlex allows up to 200)
+    
+    Returns:
+        List of pages (each a list of works), in page order
+    """
+    pager = Works().filter(**filters).paginate(method="cursor", per_page=per_page, n_max=None)
+    
+    pages = []
+    for page, works in enumerate(pager, start=1):
+        print(f"  Fetched {label} page {page} ({len(works)} works)")
+        pages.append(works)
+    return pages
+
+
 def fetch_recent_works(field_id, subfield_id, days=3):
     """Fetch works filtered by PRIMARY field or subfield ID from the last N days.
     
@@ -112,65 +215,37 @@ def fetch_recent_works(field_id, subfield_id, days=3):
     
     # Filter works by primary_topic.field.id OR primary_topic.subfield.id and publication date
     # Using primary_topic ensures we only get papers where AI is the PRIMARY topic
-    all_works = []
-    seen_ids = set()  # Track work IDs to avoid duplicates
+    # Works keyed by ID: merging pages with dict.update deduplicates in C, and the
+    # dict keeps first-seen order (a repeated work just refreshes its value)
+    all_works_by_id = {}
     
     per_page = 200  # OpenAlex allows up to 200 per page
     
-    # Fetch works for field if available (using PRIMARY topic filter)
-    if field_id:
-        print(f"Fetching works with PRIMARY field ID: {field_id}")
-        page = 1
-        while True:
-            print(f"  Fetching field page {page}...")
-            works_query = Works().filter(
-                **{"primary_topic.field.id": field_id, "from_publication_date": date_from}
-            )
-            works = works_query.get(per_page=per_page, page=page)
-            
-            if not works or len(works) == 0:
-                break
-            
-            # Add unique works
-            for work in works:
-                work_id = work.get('id')
-                if work_id and work_id not in seen_ids:
-                    seen_ids.add(work_id)
-                    all_works.append(work)
-            
-            print(f"    Found {len(works)} works on page {page} (unique total so far: {len(all_works)})")
-            
-            if len(works) < per_page:
-                break
-            page += 1
-    
-    # Fetch works for subfield if available (using PRIMARY topic filter)
-    if subfield_id:
-        print(f"Fetching works with PRIMARY subfield ID: {subfield_id}")
-        page = 1
-        while True:
-            print(f"  Fetching subfield page {page}...")
-            works_query = Works().filter(
-                **{"primary_topic.subfield.id": subfield_id, "from_publication_date": date_from}
-            )
-            works = works_query.get(per_page=per_page, page=page)
-            
-            if not works or len(works) == 0:
-                break
-            
+    # Fetch works for field and subfield if available (using PRIMARY topic filters).
+    # Each query's cursor pages come in sequence, but the two queries are independent
+    # and run side by side.
+    queries = [
+        (label, {filter_key: topic_id, "from_publication_date": date_from})
+        for label, filter_key, topic_id in (
+            ("field", "primary_topic.field.id", field_id),
+            ("subfield", "primary_topic.subfield.id", subfield_id),
+        )
+        if topic_id
+    ]
+    for label, filters in queries:
+        print(f"Fetching works with PRIMARY {label} filter: {filters}")
+    
+    with ThreadPoolExecutor(max_workers=max(len(queries), 1)) as executor:
+        futures = [executor.submit(fetch_pages, filters, label, per_page) for label, filters in queries]
+    
+    for (label, _), future in zip(queries, futures):
+        for page, works in enumerate(future.result(), start=1):
             # Add unique works
-            for work in works:
-                work_id = work.get('id')
-                if work_id and work_id not in seen_ids:
-                    seen_ids.add(work_id)
-                    all_works.append(work)
-            
-            print(f"    Found {len(works)} works on page {page} (unique total so far: {len(all_works)})")
+            all_works_by_id.update({work['id']: work for work in works if work.get('id')})
             
-            if len(works) < per_page:
-                break
-            page += 1
+            print(f"    Found {len(works)} works on {label} page {page} (unique total so far: {len(all_works_by_id)})")
     
+    all_works = list(all_works_by_id.values())
     print(f"Total unique works fetched: {len(all_works)}")
     return all_works
 
@@ -198,9 +273,15 @@ def save_to_json(works, days=3, output_dir='temp'):
         "papers": works
     }
     
-    # Save the data to the file
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Save the data to the file. The file is read back by load_papers_from_json.py,
+    # not by people, so it is written compact (no indentation or spaces).
+    if orjson is not None:
+        # orjson always writes UTF-8 (no ASCII escaping), matching ensure_ascii=False
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data))
+    else:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
     
     print(f"\nSaved {len(works)} AI research papers to {filename}")
     return filename
@@ -4,48 +4,226 @@ Script to load AI papers from JSON file into the database.
 
 This script:
 1. Takes a JSON filepath as command-line argument
-2. Loads the data from JSON
+2. Streams the papers from JSON (one batch in memory at a time)
 3. Connects to the database using db_connection
 4. Creates papers table if necessary
 5. Processes the data for the papers table
 6. Inserts the data into the table with deduplication (based on openalex_id)
 """
 
-import json
+import io
+import csv
 import sys
 import os
-from typing import Dict, Any, Optional
+from collections import defaultdict
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Dict, Any, Iterable, Iterator, Optional
 from datetime import datetime
 
-from db_connection import DatabaseConnection
+# orjson parses straight from bytes and is several times faster on large dumps;
+# fall back to the standard library if it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+# ijson parses the papers array incrementally, so memory stays bounded by one
+# batch instead of the whole document; without it the file is loaded at once
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from db_connection import DatabaseConnection, build_prepared_statement
+from create_dashboard_mviews import refresh_dashboard_mviews
+from create_papers_table import (
+    BULK_LOAD_THRESHOLD, CLUSTER_ON_SQL, install_validate_function, secondary_indexes_dropped,
+)
+
+
+# Columns filled from process_paper(), in tuple order
+PAPER_COLUMNS = (
+    'openalex_id', 'doi', 'title', 'paper_type', 'publication_date', 'publication_year',
+    'primary_topic_name', 'primary_topic_score', 'subfield_name', 'field_name', 'domain_name',
+    'is_open_access', 'oa_status',
+    'cited_by_count', 'citation_percentile', 'is_top_1_percent', 'is_top_10_percent',
+    'citation_percentile_min', 'citation_percentile_max', 'fwci',
+    'countries_count', 'institutions_count',
+)
+
+# Initial load into an empty table: COPY streams rows without the SQL parser or
+# ON CONFLICT checks. created_at/updated_at fall back to their column defaults.
+COPY_SQL = f"COPY papers ({', '.join(PAPER_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+# Loads into an existing table: COPY into a per-batch staging table with the
+# column types of papers (no constraints or indexes; temporary tables are never
+# WAL-logged), then merge it with one INSERT ... SELECT ... ON CONFLICT
+STAGING_TABLE_SQL = (
+    "CREATE TEMP TABLE staged_papers ON COMMIT DROP AS "
+    f"SELECT {', '.join(PAPER_COLUMNS)}, NULL::bigint AS ord FROM papers WITH NO DATA;"
+)
+# ord is each row's position in the COPY, so the merge can keep the last copy of a paper
+STAGING_COPY_SQL = f"COPY staged_papers ({', '.join(PAPER_COLUMNS)}, ord) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+# ON CONFLICT clause shared by the per-paper upsert and the staged merge
+_CONFLICT_SQL = """
+ON CONFLICT (openalex_id) 
+DO UPDATE SET
+    doi = EXCLUDED.doi,
+    title = EXCLUDED.title,
+    paper_type = EXCLUDED.paper_type,
+    publication_date = EXCLUDED.publication_date,
+    publication_year = EXCLUDED.publication_year,
+    primary_topic_name = EXCLUDED.primary_topic_name,
+    primary_topic_score = EXCLUDED.primary_topic_score,
+    subfield_name = EXCLUDED.subfield_name,
+    field_name = EXCLUDED.field_name,
+    domain_name = EXCLUDED.domain_name,
+    is_open_access = EXCLUDED.is_open_access,
+    oa_status = EXCLUDED.oa_status,
+    cited_by_count = EXCLUDED.cited_by_count,
+    citation_percentile = EXCLUDED.citation_percentile,
+    is_top_1_percent = EXCLUDED.is_top_1_percent,
+    is_top_10_percent = EXCLUDED.is_top_10_percent,
+    citation_percentile_min = EXCLUDED.citation_percentile_min,
+    citation_percentile_max = EXCLUDED.citation_percentile_max,
+    fwci = EXCLUDED.fwci,
+    countries_count = EXCLUDED.countries_count,
+    institutions_count = EXCLUDED.institutions_count,
+    updated_at = CURRENT_TIMESTAMP
+-- Papers whose values are unchanged (e.g. re-loading an overlapping file) are
+-- left alone instead of rewritten, so they cost no new row version or WAL
+WHERE (
+    papers.doi, papers.title, papers.paper_type, papers.publication_date, papers.publication_year,
+    papers.primary_topic_name, papers.primary_topic_score, papers.subfield_name, papers.field_name, papers.domain_name,
+    papers.is_open_access, papers.oa_status,
+    papers.cited_by_count, papers.citation_percentile, papers.is_top_1_percent, papers.is_top_10_percent,
+    papers.citation_percentile_min, papers.citation_percentile_max, papers.fwci,
+    papers.countries_count, papers.institutions_count
+) IS DISTINCT FROM (
+    EXCLUDED.doi, EXCLUDED.title, EXCLUDED.paper_type, EXCLUDED.publication_date, EXCLUDED.publication_year,
+    EXCLUDED.primary_topic_name, EXCLUDED.primary_topic_score, EXCLUDED.subfield_name, EXCLUDED.field_name, EXCLUDED.domain_name,
+    EXCLUDED.is_open_access, EXCLUDED.oa_status,
+    EXCLUDED.cited_by_count, EXCLUDED.citation_percentile, EXCLUDED.is_top_1_percent, EXCLUDED.is_top_10_percent,
+    EXCLUDED.citation_percentile_min, EXCLUDED.citation_percentile_max, EXCLUDED.fwci,
+    EXCLUDED.countries_count, EXCLUDED.institutions_count
+);
+"""
+
+# Batch upsert, run as a server-side prepared statement (see _UPSERT_STATEMENT)
+_INSERT_SQL = """
+INSERT INTO papers (
+    openalex_id, doi, title, paper_type, publication_date, publication_year,
+    primary_topic_name, primary_topic_score, subfield_name, field_name, domain_name,
+    is_open_access, oa_status,
+    cited_by_count, citation_percentile, is_top_1_percent, is_top_10_percent,
+    citation_percentile_min, citation_percentile_max, fwci,
+    countries_count, institutions_count,
+    updated_at
+)
+-- One text[] parameter per column, so the statement text (and its prepared plan)
+-- is the same for any batch size; values are cast back to the column types here
+SELECT
+    openalex_id, doi, title, paper_type, publication_date::date, publication_year::integer,
+    primary_topic_name, primary_topic_score::double precision, subfield_name, field_name, domain_name,
+    is_open_access::boolean, oa_status,
+    cited_by_count::integer, citation_percentile::double precision,
+    is_top_1_percent::boolean, is_top_10_percent::boolean,
+    citation_percentile_min::integer, citation_percentile_max::integer, fwci::double precision,
+    countries_count::integer, institutions_count::integer,
+    CURRENT_TIMESTAMP
+FROM unnest(
+    %s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[],
+    %s::text[], %s::text[], %s::text[], %s::text[], %s::text[],
+    %s::text[], %s::text[],
+    %s::text[], %s::text[], %s::text[], %s::text[],
+    %s::text[], %s::text[], %s::text[],
+    %s::text[], %s::text[]
+) AS batch (
+    openalex_id, doi, title, paper_type, publication_date, publication_year,
+    primary_topic_name, primary_topic_score, subfield_name, field_name, domain_name,
+    is_open_access, oa_status,
+    cited_by_count, citation_percentile, is_top_1_percent, is_top_10_percent,
+    citation_percentile_min, citation_percentile_max, fwci,
+    countries_count, institutions_count
+)
+""" + _CONFLICT_SQL
+
+# Set-based merge of a batch COPY'd into staged_papers. DISTINCT ON because
+# ON CONFLICT cannot update the same row twice in one statement; the last
+# staged copy of a paper wins, as it would with one upsert per row.
+_MERGE_SQL = f"""
+INSERT INTO papers ({', '.join(PAPER_COLUMNS)}, updated_at)
+SELECT DISTINCT ON (openalex_id) {', '.join(PAPER_COLUMNS)}, CURRENT_TIMESTAMP
+FROM staged_papers
+ORDER BY openalex_id, ord DESC
+""" + _CONFLICT_SQL
+
+# (statement name, PREPARE sql, EXECUTE sql) for _INSERT_SQL, built once at import
+_UPSERT_STATEMENT = build_prepared_statement(_INSERT_SQL)
+
+# Papers per COPY (bounds the CSV buffer)
+COPY_BATCH_SIZE = 10000
+
+# Papers written per transaction (one commit, and one WAL flush, per interval)
+COMMIT_INTERVAL = 10000
+
+# Flat (non-nested) fields read by process_paper, fetched with one C-level call
+_flat_getter = itemgetter(
+    'id', 'title', 'display_name', 'type', 'publication_date', 'publication_year',
+    'cited_by_count', 'countries_distinct_count', 'institutions_distinct_count',
+)
+
+
+# Shared stand-in for missing nested objects in process_paper (never mutated)
+_EMPTY = {}
+
+
+def _none():
+    """Default factory for works missing one of the flat fields."""
+    return None
 
 
 def table_exists() -> bool:
     """Check if the papers table exists in the database."""
-    with DatabaseConnection.get_cursor() as cur:
-        cur.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'public' 
-                AND table_name = 'papers'
-            );
-        """)
-        result = cur.fetchone()
-        return result[0] if result else False
-
-
-def create_papers_table_if_needed():
-    """Create the papers table if it doesn't exist."""
+    # Direct catalog lookup (NULL when missing) instead of the information_schema
+    # view; read-only, so the cursor runs in autocommit and skips the COMMIT
+    with DatabaseConnection.get_cursor(readonly=True) as cur:
+        cur.execute("SELECT to_regclass('public.papers') IS NOT NULL;")
+        return cur.fetchone()[0]
+
+
+def create_papers_table_if_needed() -> bool:
+    """
+    Create the papers table if it doesn't exist.
+    
+    Returns:
+        True if the table was created (and is therefore empty), False if it already existed
+    """
     if table_exists():
         print("ℹ Papers table already exists. Skipping creation.")
-        return
+        # test_papers_data.py needs validate_papers() at the current version
+        install_validate_function()
+        return False
     
     print("Creating papers table...")
     
-    # Create pg_trgm extension (needed for text search index)
+    # Create extensions (pg_trgm is needed for the text search index)
     with DatabaseConnection.get_cursor() as cur:
         cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
         print("✓ pg_trgm extension checked/created")
+        
+        # tdigest is optional: when installed, the dashboard medians use it instead of an exact sort
+        cur.execute("SELECT EXISTS (SELECT FROM pg_available_extensions WHERE name = 'tdigest');")
+        if cur.fetchone()[0]:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS tdigest;")
+            print("✓ tdigest extension checked/created")
+        else:
+            print("ℹ tdigest extension not available; dashboard medians will be computed exactly")
     
     # Create the table
     create_table_sql = """
@@ -57,13 +235,15 @@ def create_papers_table_if_needed():
         
         -- Basic paper information
         title TEXT NOT NULL,
+        title_short VARCHAR(200) GENERATED ALWAYS AS (substring(lower(title), 1, 200)) STORED,  -- trigram search key
+        title_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', title)) STORED,  -- full-text search
         paper_type VARCHAR(50),  -- article, etc.
         publication_date DATE,
         publication_year INTEGER,
         
         -- Primary topic/classification (flattened from nested structure)
         primary_topic_name VARCHAR(255),
-        primary_topic_score DECIMAL(10, 8),
+        primary_topic_score DOUBLE PRECISION,
         subfield_name VARCHAR(255),  -- e.g., "Artificial Intelligence"
         field_name VARCHAR(255),     -- e.g., "Computer Science"
         domain_name VARCHAR(255),
@@ -74,12 +254,12 @@ def create_papers_table_if_needed():
         
         -- Citation metrics (quantitative)
         cited_by_count INTEGER DEFAULT 0,
-        citation_percentile DECIMAL(10, 8),  -- 0.0 to 1.0
+        citation_percentile DOUBLE PRECISION,  -- 0.0 to 1.0
         is_top_1_percent BOOLEAN,
         is_top_10_percent BOOLEAN,
         citation_percentile_min INTEGER,  -- min percentile year
         citation_percentile_max INTEGER,  -- max percentile year
-        fwci DECIMAL(10, 8),  -- Field-Weighted Citation Impact
+        fwci DOUBLE PRECISION,  -- Field-Weighted Citation Impact
         
         -- Collaboration metrics (quantitative)
         countries_count INTEGER DEFAULT 0,
@@ -88,7 +268,7 @@ def create_papers_table_if_needed():
         -- Metadata
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+    ) WITH (fillfactor = 85, autovacuum_vacuum_scale_factor = 0.02);
     """
     
     with DatabaseConnection.get_cursor() as cur:
@@ -98,24 +278,29 @@ def create_papers_table_if_needed():
     # Create indexes
     indexes = [
         "CREATE INDEX idx_papers_publication_date ON papers(publication_date);",
+        "CREATE INDEX idx_papers_pubdate_brin ON papers USING brin(publication_date) WITH (pages_per_range = 32);",
         "CREATE INDEX idx_papers_publication_year ON papers(publication_year);",
-        "CREATE INDEX idx_papers_cited_by_count ON papers(cited_by_count);",
-        "CREATE INDEX idx_papers_oa_status ON papers(oa_status);",
-        "CREATE INDEX idx_papers_subfield ON papers(subfield_name);",
-        "CREATE INDEX idx_papers_field ON papers(field_name);",
+        "CREATE INDEX idx_papers_top_cited ON papers(cited_by_count DESC) INCLUDE (publication_year, field_name, subfield_name, oa_status, citation_percentile) WHERE cited_by_count IS NOT NULL;",
         "CREATE INDEX idx_papers_primary_topic ON papers(primary_topic_name);",
         "CREATE INDEX idx_papers_citation_percentile ON papers(citation_percentile);",
         "CREATE INDEX idx_papers_fwci ON papers(fwci);",
-        "CREATE INDEX idx_papers_title_trgm ON papers USING gin(title gin_trgm_ops);",
+        "CREATE INDEX idx_papers_top1 ON papers(id) WHERE is_top_1_percent;",
+        "CREATE INDEX idx_papers_top10 ON papers(id) WHERE is_top_10_percent;",
+        "CREATE INDEX idx_papers_empty_title ON papers(id) WHERE title IS NULL OR title = '';",
+        "CREATE INDEX idx_papers_negative_counts ON papers(id) WHERE cited_by_count < 0 OR countries_count < 0 OR institutions_count < 0;",
+        "CREATE INDEX idx_papers_invalid_scores ON papers(id) WHERE citation_percentile < 0.0 OR citation_percentile > 1.0 OR primary_topic_score < 0.0 OR primary_topic_score > 1.0 OR fwci < 0.0;",
+        "CREATE INDEX idx_papers_doi ON papers(doi) WHERE doi IS NOT NULL AND doi != '';",
+        "CREATE INDEX idx_papers_title_short_trgm ON papers USING gin(title_short gin_trgm_ops);",
+        "CREATE INDEX idx_papers_title_tsv ON papers USING gin(title_tsv);",
     ]
     
     with DatabaseConnection.get_cursor() as cur:
-        for idx_sql in indexes:
-            try:
-                cur.execute(idx_sql)
-            except Exception as e:
-                # Index might already exist, continue
-                print(f"  Note: {e}")
+        # Every index in one round-trip; IF NOT EXISTS skips any that already exist
+        cur.execute("\n".join(
+            idx_sql.replace("CREATE INDEX", "CREATE INDEX IF NOT EXISTS", 1) for idx_sql in indexes
+        ))
+        # Mark the clustering index so CLUSTER after a bulk load keeps rows in date order
+        cur.execute(CLUSTER_ON_SQL)
         print("✓ Indexes created")
     
     # Add comments
@@ -128,19 +313,25 @@ def create_papers_table_if_needed():
     ]
     
     with DatabaseConnection.get_cursor() as cur:
-        for obj_type, obj_name, comment_text in comments:
-            cur.execute(f"COMMENT ON {obj_type} {obj_name} IS %s;", (comment_text,))
+        # All comments in one round-trip
+        cur.execute(
+            "\n".join(f"COMMENT ON {obj_type} {obj_name} IS %s;" for obj_type, obj_name, _ in comments),
+            [comment_text for _, _, comment_text in comments]
+        )
         print("✓ Comments added")
+    
+    # Install the function the data quality validator runs
+    install_validate_function()
+    
+    return True
 
 
 def extract_doi(paper: Dict[str, Any]) -> Optional[str]:
     """Extract DOI from paper data."""
     doi = paper.get('doi')
     if doi:
-        # Remove 'https://doi.org/' prefix if present
-        if doi.startswith('https://doi.org/'):
-            return doi.replace('https://doi.org/', '')
-        return doi
+        # Remove 'https://doi.org/' prefix if present (a length check and one slice)
+        return doi.removeprefix('https://doi.org/')
     return None
 
 
@@ -151,53 +342,58 @@ def process_paper(paper: Dict[str, Any]) -> tuple:
     Returns:
         Tuple of values in the order of database columns
     """
+    # Flat fields in one call; OpenAlex works normally carry all of them, so the
+    # None-defaulting copy is only made for the rare work missing one
+    try:
+        flat = _flat_getter(paper)
+    except KeyError:
+        flat = _flat_getter(defaultdict(_none, paper))
+    (work_id, title, display_name, paper_type, publication_date, publication_year,
+     cited_by_count, countries_count, institutions_count) = flat
+    
+    # Bound once: the nested lookups below all go through it
+    paper_get = paper.get
+    
     # Identifiers
-    openalex_id = paper.get('id', '').replace('https://openalex.org/', '')
+    openalex_id = (work_id or '').removeprefix('https://openalex.org/')
     doi = extract_doi(paper)
     
     # Basic information
-    title = paper.get('title', '') or paper.get('display_name', '')
-    paper_type = paper.get('type')
-    publication_date = paper.get('publication_date')
-    publication_year = paper.get('publication_year')
-    
-    # Primary topic (flattened)
-    primary_topic = paper.get('primary_topic', {})
-    primary_topic_name = primary_topic.get('display_name') if primary_topic else None
-    primary_topic_score = primary_topic.get('score') if primary_topic else None
-    
-    subfield = primary_topic.get('subfield', {}) if primary_topic else {}
-    subfield_name = subfield.get('display_name') if subfield else None
-    
-    field = primary_topic.get('field', {}) if primary_topic else {}
-    field_name = field.get('display_name') if field else None
-    
-    domain = primary_topic.get('domain', {}) if primary_topic else {}
-    domain_name = domain.get('display_name') if domain else None
+    title = title or display_name
+    
+    # Primary topic (flattened). Missing or null nested objects become the shared
+    # _EMPTY dict, so each lookup below is a single get with no truthiness branch.
+    primary_topic = paper_get('primary_topic') or _EMPTY
+    topic_get = primary_topic.get
+    primary_topic_name = topic_get('display_name')
+    primary_topic_score = topic_get('score')
+    subfield_name = (topic_get('subfield') or _EMPTY).get('display_name')
+    field_name = (topic_get('field') or _EMPTY).get('display_name')
+    domain_name = (topic_get('domain') or _EMPTY).get('display_name')
     
     # Open Access information
-    open_access = paper.get('open_access', {})
-    is_open_access = open_access.get('is_oa', False) if open_access else False
-    oa_status = open_access.get('oa_status') if open_access else None
+    open_access = paper_get('open_access') or _EMPTY
+    is_open_access = open_access.get('is_oa', False)
+    oa_status = open_access.get('oa_status')
     
     # Citation metrics
-    cited_by_count = paper.get('cited_by_count', 0) or 0
+    cited_by_count = cited_by_count or 0
     
-    citation_normalized = paper.get('citation_normalized_percentile', {})
-    citation_percentile = citation_normalized.get('value') if citation_normalized else None
-    is_top_1_percent = citation_normalized.get('is_in_top_1_percent', False) if citation_normalized else False
-    is_top_10_percent = citation_normalized.get('is_in_top_10_percent', False) if citation_normalized else False
+    citation_normalized = paper_get('citation_normalized_percentile') or _EMPTY
+    citation_percentile = citation_normalized.get('value')
+    is_top_1_percent = citation_normalized.get('is_in_top_1_percent', False)
+    is_top_10_percent = citation_normalized.get('is_in_top_10_percent', False)
     
-    cited_by_percentile_year = paper.get('cited_by_percentile_year', {})
-    citation_percentile_min = cited_by_percentile_year.get('min') if cited_by_percentile_year else None
-    citation_percentile_max = cited_by_percentile_year.get('max') if cited_by_percentile_year else None
+    cited_by_percentile_year = paper_get('cited_by_percentile_year') or _EMPTY
+    citation_percentile_min = cited_by_percentile_year.get('min')
+    citation_percentile_max = cited_by_percentile_year.get('max')
     
     # FWCI (Field-Weighted Citation Impact) - not directly in JSON, set to None
     fwci = None
     
     # Collaboration metrics
-    countries_count = paper.get('countries_distinct_count', 0) or 0
-    institutions_count = paper.get('institutions_distinct_count', 0) or 0
+    countries_count = countries_count or 0
+    institutions_count = institutions_count or 0
     
     return (
         openalex_id,
@@ -231,8 +427,12 @@ def load_json_file(filepath: str) -> Dict[str, Any]:
         raise FileNotFoundError(f"JSON file not found: {filepath}")
     
     print(f"Loading JSON file: {filepath}")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if orjson is not None:
+        with open(filepath, 'rb') as f:
+            data = orjson.loads(f.read())
+    else:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
     
     # Handle both formats: direct list or dict with 'papers' key
     if isinstance(data, list):
@@ -248,116 +448,225 @@ def load_json_file(filepath: str) -> Dict[str, Any]:
     return papers
 
 
-def insert_papers_with_deduplication(papers: list, batch_size: int = 100):
+def iter_json_papers(filepath: str) -> Iterator[Dict[str, Any]]:
     """
-    Insert papers into database with deduplication.
-    Uses ON CONFLICT to skip duplicates based on openalex_id.
-    """
-    insert_sql = """
-    INSERT INTO papers (
-        openalex_id, doi, title, paper_type, publication_date, publication_year,
-        primary_topic_name, primary_topic_score, subfield_name, field_name, domain_name,
-        is_open_access, oa_status,
-        cited_by_count, citation_percentile, is_top_1_percent, is_top_10_percent,
-        citation_percentile_min, citation_percentile_max, fwci,
-        countries_count, institutions_count,
-        updated_at
-    ) VALUES (
-        %s, %s, %s, %s, %s, %s,
-        %s, %s, %s, %s, %s,
-        %s, %s,
-        %s, %s, %s, %s,
-        %s, %s, %s,
-        %s, %s,
-        CURRENT_TIMESTAMP
-    )
-    ON CONFLICT (openalex_id) 
-    DO UPDATE SET
-        doi = EXCLUDED.doi,
-        title = EXCLUDED.title,
-        paper_type = EXCLUDED.paper_type,
-        publication_date = EXCLUDED.publication_date,
-        publication_year = EXCLUDED.publication_year,
-        primary_topic_name = EXCLUDED.primary_topic_name,
-        primary_topic_score = EXCLUDED.primary_topic_score,
-        subfield_name = EXCLUDED.subfield_name,
-        field_name = EXCLUDED.field_name,
-        domain_name = EXCLUDED.domain_name,
-        is_open_access = EXCLUDED.is_open_access,
-        oa_status = EXCLUDED.oa_status,
-        cited_by_count = EXCLUDED.cited_by_count,
-        citation_percentile = EXCLUDED.citation_percentile,
-        is_top_1_percent = EXCLUDED.is_top_1_percent,
-        is_top_10_percent = EXCLUDED.is_top_10_percent,
-        citation_percentile_min = EXCLUDED.citation_percentile_min,
-        citation_percentile_max = EXCLUDED.citation_percentile_max,
-        fwci = EXCLUDED.fwci,
-        countries_count = EXCLUDED.countries_count,
-        institutions_count = EXCLUDED.institutions_count,
-        updated_at = CURRENT_TIMESTAMP;
+    Return an iterator over the papers in a JSON file.
+    
+    With ijson installed the papers array is parsed one paper at a time, so
+    memory use does not grow with the file size. Otherwise this falls back to
+    load_json_file. Both file formats (direct list, or dict with 'papers' key)
+    are supported.
+    
+    Args:
+        filepath: Path to the JSON file
+    
+    Returns:
+        Iterator of paper dicts
     """
+    if ijson is None:
+        return iter(load_json_file(filepath))
     
-    processed_papers = []
-    skipped = 0
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"JSON file not found: {filepath}")
     
-    print(f"\nProcessing {len(papers)} papers...")
+    print(f"Streaming JSON file: {filepath}")
+    with open(filepath, 'rb') as f:
+        head = f.read(1024).lstrip()
+    
+    if head.startswith(b'['):
+        prefix = 'item'
+    elif head.startswith(b'{'):
+        prefix = 'papers.item'
+        # save_to_json writes metadata before papers, so this only reads the file head
+        with open(filepath, 'rb') as f:
+            metadata = next(ijson.items(f, 'metadata'), None)
+        if metadata is not None:
+            print(f"  Metadata: {metadata}")
+    else:
+        raise ValueError("JSON file must contain either a list of papers or a dict with 'papers' key")
     
-    for paper in papers:
-        try:
-            processed = process_paper(paper)
-            # Validate that openalex_id is not empty
-            if not processed[0]:
-                skipped += 1
-                continue
-            processed_papers.append(processed)
-        except Exception as e:
-            print(f"  Warning: Error processing paper {paper.get('id', 'unknown')}: {e}")
-            skipped += 1
-            continue
+    def _papers():
+        with open(filepath, 'rb') as f:
+            yield from ijson.items(f, prefix, use_float=True)
     
-    if skipped > 0:
-        print(f"  Skipped {skipped} papers due to errors or missing openalex_id")
+    return _papers()
+
+
+def copy_batch(cur, batch: list, copy_sql: str = COPY_SQL):
+    """
+    Load a batch of processed papers with COPY.
+    
+    Args:
+        cur: Cursor to run COPY on
+        batch: List of tuples from process_paper()
+        copy_sql: COPY ... FROM STDIN statement (COPY_SQL loads papers directly,
+            STAGING_COPY_SQL loads the staging table and expects each tuple
+            to end with its ord)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # \N marks NULL, so NULL and '' stay distinct in CSV
+    writer.writerows(
+        tuple('\\N' if value is None else value for value in row)
+        for row in batch
+    )
+    buffer.seek(0)
+    cur.copy_expert(copy_sql, buffer)
+
+
+def insert_papers_with_deduplication(papers: Iterable[Dict[str, Any]], batch_size: int = COPY_BATCH_SIZE,
+                                     use_copy: bool = False, bulk_mode: Optional[bool] = None):
+    """
+    Insert papers into database with deduplication.
+    Uses ON CONFLICT to skip duplicates based on openalex_id.
     
-    print(f"  Processed {len(processed_papers)} papers for insertion")
+    Args:
+        papers: Iterable of paper dicts from the JSON file
+        batch_size: Papers per COPY (bounds the CSV buffer held in memory)
+        use_copy: If True (the table was just created and is empty), COPY straight
+            into papers. Otherwise each batch is COPY'd into a staging table and
+            merged with one INSERT ... SELECT ... ON CONFLICT.
+        bulk_mode: If True, drop the secondary indexes for the load and rebuild them
+            afterwards (see secondary_indexes_dropped). If None, enabled when there
+            are more than BULK_LOAD_THRESHOLD papers.
+    
+    Writes are committed every COMMIT_INTERVAL papers rather than per batch. Each
+    batch runs inside a savepoint: if it fails, only that batch is rolled back
+    and its papers are retried one by one with INSERT ... ON CONFLICT.
+    """
+    # The fallback upsert is prepared once per server session, and only once a batch
+    # has failed, so the happy path leaves no named statement on pooled backends
+    statement_name, prepare_sql, execute_sql = _UPSERT_STATEMENT
     
-    # Insert in batches
+    skipped = 0
     total_inserted = 0
     total_updated = 0
+    batch = []
+    batch_number = 0
+    
+    if bulk_mode is None:
+        # Read just past the threshold to size the load without consuming the stream
+        papers = iter(papers)
+        head = list(islice(papers, BULK_LOAD_THRESHOLD + 1))
+        bulk_mode = len(head) > BULK_LOAD_THRESHOLD
+        papers = chain(head, papers)
     
-    with DatabaseConnection.get_connection_context() as conn:
+    print("\nProcessing and inserting papers...")
+    
+    with secondary_indexes_dropped(bulk_mode), DatabaseConnection.get_connection_context() as conn:
         cur = conn.cursor()
         
-        for i in range(0, len(processed_papers), batch_size):
-            batch = processed_papers[i:i + batch_size]
+        # Papers written since the last commit
+        uncommitted = 0
+        # Whether the upsert is known to be prepared in the current transaction
+        prepared = False
+        
+        def begin_if_needed():
+            """Set up a new transaction before its first statement."""
+            nonlocal prepared
+            if conn.info.transaction_status == TRANSACTION_STATUS_IDLE:
+                # Asynchronous commit for this load only (SET LOCAL): a crash can lose the
+                # last few commits, and re-running the load is idempotent (ON CONFLICT).
+                cur.execute("SET LOCAL synchronous_commit = off;")
+                # The transaction-mode pooler may hand the next transaction a different
+                # server session, so the prepared upsert has to be checked for again
+                prepared = False
+        
+        def upsert(rows):
+            """
+            Upsert rows with one EXECUTE of the prepared statement (one array per column).
             
+            The statement is prepared on first use in each transaction. The EXECUTE runs
+            inside a savepoint set in the same round-trip, so a failure can be undone with
+            ROLLBACK TO SAVEPOINT batch_sp without losing the rest of the open transaction.
+            """
+            nonlocal prepared
+            if not prepared:
+                cur.execute(
+                    "SELECT EXISTS (SELECT FROM pg_prepared_statements WHERE name = %s);",
+                    (statement_name,)
+                )
+                if not cur.fetchone()[0]:
+                    cur.execute(prepare_sql)
+                prepared = True
+            cur.execute(
+                "SAVEPOINT batch_sp; " + execute_sql + "; RELEASE SAVEPOINT batch_sp;",
+                [list(column) for column in zip(*rows)]
+            )
+        
+        def write_batch(rows, number):
+            """Write a batch in the open transaction; return how many papers were written."""
+            nonlocal uncommitted
+            begin_if_needed()
             try:
-                # Use executemany for batch insertion
-                cur.executemany(insert_sql, batch)
-                conn.commit()
-                
-                # Count how many were inserted vs updated
-                # We can't easily distinguish, but we can check affected rows
-                # For simplicity, we'll just report the batch size
-                batch_size_actual = len(batch)
-                total_inserted += batch_size_actual
-                
-                print(f"  Inserted/updated batch {i//batch_size + 1} ({batch_size_actual} papers)")
-                
+                cur.execute("SAVEPOINT batch_sp;")
+                if use_copy:
+                    copy_batch(cur, rows)
+                    cur.execute("RELEASE SAVEPOINT batch_sp;")
+                    print(f"  Copied batch {number} ({len(rows)} papers)")
+                else:
+                    # One COPY and one set-based statement per batch instead of one
+                    # statement per paper. staged_papers is dropped right after the
+                    # merge so the next batch in this transaction can create it again.
+                    cur.execute(STAGING_TABLE_SQL)
+                    copy_batch(cur, [row + (position,) for position, row in enumerate(rows)], STAGING_COPY_SQL)
+                    cur.execute(_MERGE_SQL + " DROP TABLE staged_papers; RELEASE SAVEPOINT batch_sp;")
+                    # We can't easily tell inserts from updates, so report the batch size
+                    print(f"  Inserted/updated batch {number} ({len(rows)} papers)")
+                written = len(rows)
+            
             except Exception as e:
-                conn.rollback()
-                print(f"  Error inserting batch {i//batch_size + 1}: {e}")
+                # Only this batch is undone; earlier batches in the transaction are kept
+                cur.execute("ROLLBACK TO SAVEPOINT batch_sp;")
+                print(f"  Error inserting batch {number}: {e}")
                 # Try inserting one by one to identify problematic records
-                for paper_data in batch:
+                written = 0
+                for paper_data in rows:
                     try:
-                        cur.execute(insert_sql, paper_data)
-                        conn.commit()
-                        total_inserted += 1
+                        upsert([paper_data])
+                        written += 1
                     except Exception as e2:
-                        conn.rollback()
+                        cur.execute("ROLLBACK TO SAVEPOINT batch_sp;")
                         print(f"    Failed to insert paper {paper_data[0]}: {e2}")
+            
+            # One commit per COMMIT_INTERVAL papers instead of one per batch
+            uncommitted += len(rows)
+            if uncommitted >= COMMIT_INTERVAL:
+                conn.commit()
+                uncommitted = 0
+            return written
         
+        # Papers are processed and inserted one batch at a time, so only the
+        # current batch is held in memory
+        for paper in papers:
+            try:
+                processed = process_paper(paper)
+                # Validate that openalex_id is not empty
+                if not processed[0]:
+                    skipped += 1
+                    continue
+                batch.append(processed)
+            except Exception as e:
+                print(f"  Warning: Error processing paper {paper.get('id', 'unknown')}: {e}")
+                skipped += 1
+                continue
+            
+            if len(batch) >= batch_size:
+                batch_number += 1
+                total_inserted += write_batch(batch, batch_number)
+                batch.clear()
+        
+        if batch:
+            batch_number += 1
+            total_inserted += write_batch(batch, batch_number)
+            batch.clear()
+        
+        conn.commit()
         cur.close()
     
+    if skipped > 0:
+        print(f"  Skipped {skipped} papers due to errors or missing openalex_id")
+    
     print(f"\n✓ Successfully processed {total_inserted} papers")
     return total_inserted
 
@@ -372,24 +681,29 @@ def main():
     json_filepath = sys.argv[1]
     
     try:
-        # Step 1: Load JSON data
-        papers = load_json_file(json_filepath)
-        
-        if not papers:
-            print("⚠ No papers found in JSON file.")
-            return
+        # Step 1: Open the JSON data (papers are read lazily while inserting)
+        papers = iter_json_papers(json_filepath)
         
         # Step 2: Connect to database and create table if needed
         print("\n" + "=" * 50)
         print("Database Setup")
         print("=" * 50)
-        create_papers_table_if_needed()
+        table_created = create_papers_table_if_needed()
         
         # Step 3: Process and insert papers with deduplication
         print("\n" + "=" * 50)
         print("Data Processing and Insertion")
         print("=" * 50)
-        insert_papers_with_deduplication(papers)
+        # A freshly created table is empty, so the first load can use COPY
+        total = insert_papers_with_deduplication(papers, use_copy=table_created)
+        
+        if not total:
+            print("⚠ No papers were loaded from the JSON file.")
+            return
+        
+        # Step 4: Refresh the pre-aggregated views read by the dashboard
+        print("\nRefreshing dashboard materialized views...")
+        refresh_dashboard_mviews()
         
         print("\n" + "=" * 50)
         print("✓ Successfully completed!")
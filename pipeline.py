@@ -15,17 +15,300 @@ Uses existing logic from:
 - test_papers_data.py (data quality validation)
 """
 
+import io
+import os
+import csv
 import sys
+import json
+import hashlib
+import argparse
+import traceback
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from pyalex import Works, Topics
 
-from db_connection import DatabaseConnection
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from db_connection import DatabaseConnection, build_prepared_statement
+from create_dashboard_mviews import refresh_dashboard_mviews
+from create_papers_table import (
+    BULK_LOAD_THRESHOLD, CLUSTER_ON_SQL, install_validate_function, secondary_indexes_dropped,
+)
+from fetch_ai_papers import cache_topic_ids
+
+
+# Columns filled from process_paper(), in tuple order
+PAPER_COLUMNS = (
+    'openalex_id', 'doi', 'title', 'paper_type', 'publication_date', 'publication_year',
+    'primary_topic_name', 'primary_topic_score', 'subfield_name', 'field_name', 'domain_name',
+    'is_open_access', 'oa_status',
+    'cited_by_count', 'citation_percentile', 'is_top_1_percent', 'is_top_10_percent',
+    'citation_percentile_min', 'citation_percentile_max', 'fwci',
+    'countries_count', 'institutions_count',
+)
+
+# Per-transaction staging table with the column types of papers but no constraints
+# or indexes. Temporary tables are never WAL-logged, and ON COMMIT DROP keeps it
+# inside one transaction, which is all a transaction-mode pooler guarantees.
+STAGING_TABLE_SQL = (
+    "CREATE TEMP TABLE staged_papers ON COMMIT DROP AS "
+    f"SELECT {', '.join(PAPER_COLUMNS)}, NULL::bigint AS ord FROM papers WITH NO DATA;"
+)
+# ord is each row's position in the COPY, so the merge can keep the last copy of a paper
+STAGING_COPY_SQL = f"COPY staged_papers ({', '.join(PAPER_COLUMNS)}, ord) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+# ON CONFLICT clause shared by the batch upsert and the staged merge
+_CONFLICT_SQL = """
+ON CONFLICT (openalex_id) 
+DO UPDATE SET
+    doi = EXCLUDED.doi,
+    title = EXCLUDED.title,
+    paper_type = EXCLUDED.paper_type,
+    publication_date = EXCLUDED.publication_date,
+    publication_year = EXCLUDED.publication_year,
+    primary_topic_name = EXCLUDED.primary_topic_name,
+    primary_topic_score = EXCLUDED.primary_topic_score,
+    subfield_name = EXCLUDED.subfield_name,
+    field_name = EXCLUDED.field_name,
+    domain_name = EXCLUDED.domain_name,
+    is_open_access = EXCLUDED.is_open_access,
+    oa_status = EXCLUDED.oa_status,
+    cited_by_count = EXCLUDED.cited_by_count,
+    citation_percentile = EXCLUDED.citation_percentile,
+    is_top_1_percent = EXCLUDED.is_top_1_percent,
+    is_top_10_percent = EXCLUDED.is_top_10_percent,
+    citation_percentile_min = EXCLUDED.citation_percentile_min,
+    citation_percentile_max = EXCLUDED.citation_percentile_max,
+    fwci = EXCLUDED.fwci,
+    countries_count = EXCLUDED.countries_count,
+    institutions_count = EXCLUDED.institutions_count,
+    updated_at = CURRENT_TIMESTAMP
+-- Papers whose values are unchanged (e.g. re-loading an overlapping file) are
+-- left alone instead of rewritten, so they cost no new row version or WAL
+WHERE (
+    papers.doi, papers.title, papers.paper_type, papers.publication_date, papers.publication_year,
+    papers.primary_topic_name, papers.primary_topic_score, papers.subfield_name, papers.field_name, papers.domain_name,
+    papers.is_open_access, papers.oa_status,
+    papers.cited_by_count, papers.citation_percentile, papers.is_top_1_percent, papers.is_top_10_percent,
+    papers.citation_percentile_min, papers.citation_percentile_max, papers.fwci,
+    papers.countries_count, papers.institutions_count
+) IS DISTINCT FROM (
+    EXCLUDED.doi, EXCLUDED.title, EXCLUDED.paper_type, EXCLUDED.publication_date, EXCLUDED.publication_year,
+    EXCLUDED.primary_topic_name, EXCLUDED.primary_topic_score, EXCLUDED.subfield_name, EXCLUDED.field_name, EXCLUDED.domain_name,
+    EXCLUDED.is_open_access, EXCLUDED.oa_status,
+    EXCLUDED.cited_by_count, EXCLUDED.citation_percentile, EXCLUDED.is_top_1_percent, EXCLUDED.is_top_10_percent,
+    EXCLUDED.citation_percentile_min, EXCLUDED.citation_percentile_max, EXCLUDED.fwci,
+    EXCLUDED.countries_count, EXCLUDED.institutions_count
+);
+"""
+
+# Batch upsert, run as a server-side prepared statement (see _UPSERT_STATEMENT)
+_INSERT_SQL = """
+INSERT INTO papers (
+    openalex_id, doi, title, paper_type, publication_date, publication_year,
+    primary_topic_name, primary_topic_score, subfield_name, field_name, domain_name,
+    is_open_access, oa_status,
+    cited_by_count, citation_percentile, is_top_1_percent, is_top_10_percent,
+    citation_percentile_min, citation_percentile_max, fwci,
+    countries_count, institutions_count,
+    updated_at
+)
+-- One text[] parameter per column, so the statement text (and its prepared plan)
+-- is the same for any batch size; values are cast back to the column types here
+SELECT
+    openalex_id, doi, title, paper_type, publication_date::date, publication_year::integer,
+    primary_topic_name, primary_topic_score::double precision, subfield_name, field_name, domain_name,
+    is_open_access::boolean, oa_status,
+    cited_by_count::integer, citation_percentile::double precision,
+    is_top_1_percent::boolean, is_top_10_percent::boolean,
+    citation_percentile_min::integer, citation_percentile_max::integer, fwci::double precision,
+    countries_count::integer, institutions_count::integer,
+    CURRENT_TIMESTAMP
+FROM unnest(
+    %s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[],
+    %s::text[], %s::text[], %s::text[], %s::text[], %s::text[],
+    %s::text[], %s::text[],
+    %s::text[], %s::text[], %s::text[], %s::text[],
+    %s::text[], %s::text[], %s::text[],
+    %s::text[], %s::text[]
+) AS batch (
+    openalex_id, doi, title, paper_type, publication_date, publication_year,
+    primary_topic_name, primary_topic_score, subfield_name, field_name, domain_name,
+    is_open_access, oa_status,
+    cited_by_count, citation_percentile, is_top_1_percent, is_top_10_percent,
+    citation_percentile_min, citation_percentile_max, fwci,
+    countries_count, institutions_count
+)
+""" + _CONFLICT_SQL
+
+# Set-based merge of everything COPY'd into staged_papers. DISTINCT ON because
+# ON CONFLICT cannot update the same row twice in one statement; the last
+# staged copy of a paper wins, as it would with one upsert per row.
+_MERGE_SQL = f"""
+INSERT INTO papers ({', '.join(PAPER_COLUMNS)}, updated_at)
+SELECT DISTINCT ON (openalex_id) {', '.join(PAPER_COLUMNS)}, CURRENT_TIMESTAMP
+FROM staged_papers
+ORDER BY openalex_id, ord DESC
+""" + _CONFLICT_SQL
+
+# (statement name, PREPARE sql, EXECUTE sql) for _INSERT_SQL, built once at import
+_UPSERT_STATEMENT = build_prepared_statement(_INSERT_SQL)
+
+# Papers written per transaction (one commit, and one WAL flush, per interval)
+COMMIT_INTERVAL = 10000
+
+# Connections upserting papers in parallel (each takes its own share of the batches)
+INSERT_WORKERS = 4
+
+# Flat (non-nested) fields read by process_paper, fetched with one C-level call
+_flat_getter = itemgetter(
+    'id', 'title', 'display_name', 'type', 'publication_date', 'publication_year',
+    'cited_by_count', 'countries_distinct_count', 'institutions_distinct_count',
+)
+
+
+# Shared stand-in for missing nested objects in process_paper (never mutated)
+_EMPTY = {}
+
+# Every top-level work field process_paper reads. Works are fetched with only these
+# (the OpenAlex select parameter), so the authorships, abstracts and reference
+# lists the pipeline never stores are neither downloaded nor held in memory.
+WORK_FIELDS = (
+    'id', 'doi', 'title', 'display_name', 'type', 'publication_date', 'publication_year',
+    'primary_topic', 'open_access', 'cited_by_count', 'citation_normalized_percentile',
+    'cited_by_percentile_year', 'countries_distinct_count', 'institutions_distinct_count',
+)
+
+
+def _none():
+    """Default factory for works missing one of the flat fields."""
+    return None
+
+
+def copy_to_staging(cur, rows: List[tuple]):
+    """
+    Stream processed paper tuples into staged_papers with COPY (CSV).
+    
+    Args:
+        cur: Cursor in the transaction that created staged_papers
+        rows: Tuples in PAPER_COLUMNS order (from process_paper)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # \N marks NULL, so NULL and '' stay distinct in CSV; each row ends with its ord
+    writer.writerows(
+        tuple('\\N' if value is None else value for value in row) + (position,)
+        for position, row in enumerate(rows)
+    )
+    buffer.seek(0)
+    cur.copy_expert(STAGING_COPY_SQL, buffer)
+
+
+# One data quality check. query is a select-list expression over papers that yields a
+# single count (0 when the check passes); always_report prints the result even when it
+# passes, otherwise only failures are detailed. An informational check always counts as
+# passed in the summary. unit labels the count in the report.
+QualityCheck = namedtuple(
+    'QualityCheck',
+    ['section', 'name', 'description', 'query', 'always_report', 'informational', 'unit'],
+    defaults=(False, 'record(s)'),
+)
+
+# Outcome of one check; count is None and error is set when the check could not run.
+# Status strings are only built when reporting (see run_data_quality_tests).
+TestResult = namedtuple('TestResult', ['name', 'description', 'count', 'passed', 'error'])
+
+# Every check, in report order
+DATA_QUALITY_CHECKS = (
+    QualityCheck("TEST 1: Missing Required Fields",
+                 "Missing openalex_id",
+                 "Papers with NULL or empty openalex_id (required field)",
+                 "(SELECT COUNT(*) FROM papers WHERE openalex_id IS NULL OR openalex_id = '')",
+                 True),
+    QualityCheck("TEST 1: Missing Required Fields",
+                 "Missing title",
+                 "Papers with NULL or empty title (required field)",
+                 "(SELECT COUNT(*) FROM papers WHERE title IS NULL OR title = '')",
+                 True),
+    QualityCheck("TEST 2: Citation Count Validation",
+                 "Negative cited_by_count",
+                 "Papers with negative cited_by_count (should be >= 0)",
+                 "(SELECT COUNT(*) FROM papers WHERE cited_by_count < 0)",
+                 False),
+    QualityCheck("TEST 2: Citation Count Validation",
+                 "Negative countries_count",
+                 "Papers with negative countries_count (should be >= 0)",
+                 "(SELECT COUNT(*) FROM papers WHERE countries_count < 0)",
+                 False),
+    QualityCheck("TEST 2: Citation Count Validation",
+                 "Negative institutions_count",
+                 "Papers with negative institutions_count (should be >= 0)",
+                 "(SELECT COUNT(*) FROM papers WHERE institutions_count < 0)",
+                 False),
+    QualityCheck("TEST 3: Score Range Validation",
+                 "Invalid citation_percentile range",
+                 "Papers with citation_percentile outside valid range [0.0, 1.0]",
+                 "(SELECT COUNT(*) FROM papers WHERE citation_percentile IS NOT NULL AND (citation_percentile < 0.0 OR citation_percentile > 1.0))",
+                 False),
+    QualityCheck("TEST 3: Score Range Validation",
+                 "Invalid primary_topic_score range",
+                 "Papers with primary_topic_score outside valid range [0.0, 1.0]",
+                 "(SELECT COUNT(*) FROM papers WHERE primary_topic_score IS NOT NULL AND (primary_topic_score < 0.0 OR primary_topic_score > 1.0))",
+                 False),
+    QualityCheck("TEST 3: Score Range Validation",
+                 "Negative fwci",
+                 "Papers with negative fwci (Field-Weighted Citation Impact)",
+                 "(SELECT COUNT(*) FROM papers WHERE fwci IS NOT NULL AND fwci < 0)",
+                 False),
+    # Duplicate checks: rows beyond the first for each repeated value, computed in the
+    # same pass as the total row count instead of a GROUP BY + HAVING per check
+    QualityCheck("TEST 4: Duplicate Detection",
+                 "Duplicate openalex_id",
+                 "Rows repeating an openalex_id already seen (should be 0)",
+                 "COUNT(openalex_id) - COUNT(DISTINCT openalex_id)",
+                 False),
+    QualityCheck("TEST 4: Duplicate Detection",
+                 "Duplicate DOI",
+                 "Rows repeating a DOI already seen (informational)",
+                 "COUNT(doi) FILTER (WHERE doi != '') - COUNT(DISTINCT NULLIF(doi, ''))",
+                 True,
+                 informational=True,
+                 unit="duplicate DOI row(s)"),
+)
+
+# The total row count (column 0) and every check (column i + 1 for
+# DATA_QUALITY_CHECKS[i]) as a single row, read positionally. The field and range
+# checks stay scalar subqueries instead of FILTER aggregates over the shared scan:
+# their predicates match the partial indexes from create_indexes, which are empty
+# on a clean table, so each is answered without reading the heap.
+_CHECKS_QUERY = (
+    "SELECT COUNT(*), "
+    + ", ".join(check.query for check in DATA_QUALITY_CHECKS)
+    + " FROM papers;"
+)
+
+# Changes whenever rows are added, removed or rewritten (the upserts only bump
+# updated_at on rows whose values actually changed). One plain scan, without the
+# DISTINCT sorts of the duplicate checks.
+_FINGERPRINT_QUERY = "SELECT COUNT(*), MAX(openalex_id), MAX(updated_at) FROM papers;"
+
+# Hash of the check SQL, stored with the cached results so adding or changing a
+# check invalidates them
+_CHECKS_VERSION = hashlib.md5(_CHECKS_QUERY.encode('utf-8')).hexdigest()
+
+# Table fingerprint and results of the last run where every data quality test passed
+QUALITY_CACHE_FILE = os.path.join('temp', '.quality_check_cache.json')
 
 
 class PapersDataPipeline:
     """Pipeline for processing AI papers from OpenAlex API to database."""
     
+    # Every attribute set on an instance; no per-instance __dict__
+    __slots__ = ('days', 'batch_size', 'papers')
+    
     def __init__(self, days: int = 3, batch_size: int = 100):
         """
         Initialize the pipeline.
@@ -42,6 +325,7 @@ class PapersDataPipeline:
     # Step 1: Query API to get recent papers
     # =============================================================================
     
+    @cache_topic_ids
     def search_ai_field_subfield(self):
         """Search for 'artificial intelligence' as Field or Subfield in OpenAlex Topics."""
         print("Searching for 'artificial intelligence' as Field or Subfield...")
@@ -122,6 +406,36 @@ class PapersDataPipeline:
         
         return field_id, subfield_id
     
+    def fetch_pages(self, filters: Dict[str, Any], label: str, per_page: int = 200) -> List[list]:
+        """
+        Fetch every page of a Works query using OpenAlex cursor pagination.
+        
+        Each response carries the cursor for the next page, so every page costs the
+        API the same however deep it is, and results are not capped at the 10,000
+        that page-number pagination can reach. Cursor pages are fetched in sequence.
+        Only the WORK_FIELDS of each work are requested.
+        
+        Args:
+            filters: Works filter arguments
+            label: Name used in progress messages (e.g. "field")
+            per_page: Results per page (OpenAlex allows up to 200)
+        
+        Returns:
+            List of pages (each a list of works), in page order
+        """
+        pager = (
+            Works()
+            .filter(**filters)
+            .select(list(WORK_FIELDS))
+            .paginate(method="cursor", per_page=per_page, n_max=None)
+        )
+        
+        pages = []
+        for page, works in enumerate(pager, start=1):
+            print(f"  Fetched {label} page {page} ({len(works)} works)")
+            pages.append(works)
+        return pages
+    
     def fetch_recent_works(self, field_id: Optional[str], subfield_id: Optional[str]) -> List[Dict[str, Any]]:
         """Fetch works filtered by PRIMARY field or subfield ID from the last N days."""
         print(f"Fetching works from the last {self.days} days...")
@@ -131,65 +445,37 @@ class PapersDataPipeline:
         date_from = (datetime.now() - timedelta(days=self.days)).strftime('%Y-%m-%d')
         
         # Filter works by primary_topic.field.id OR primary_topic.subfield.id and publication date
-        all_works = []
-        seen_ids = set()  # Track work IDs to avoid duplicates
+        # Works keyed by ID: merging pages with dict.update deduplicates in C, and the
+        # dict keeps first-seen order (a repeated work just refreshes its value)
+        all_works_by_id = {}
         
         per_page = 200  # OpenAlex allows up to 200 per page
         
-        # Fetch works for field if available (using PRIMARY topic filter)
-        if field_id:
-            print(f"Fetching works with PRIMARY field ID: {field_id}")
-            page = 1
-            while True:
-                print(f"  Fetching field page {page}...")
-                works_query = Works().filter(
-                    **{"primary_topic.field.id": field_id, "from_publication_date": date_from}
-                )
-                works = works_query.get(per_page=per_page, page=page)
-                
-                if not works or len(works) == 0:
-                    break
-                
-                # Add unique works
-                for work in works:
-                    work_id = work.get('id')
-                    if work_id and work_id not in seen_ids:
-                        seen_ids.add(work_id)
-                        all_works.append(work)
-                
-                print(f"    Found {len(works)} works on page {page} (unique total so far: {len(all_works)})")
-                
-                if len(works) < per_page:
-                    break
-                page += 1
-        
-        # Fetch works for subfield if available (using PRIMARY topic filter)
-        if subfield_id:
-            print(f"Fetching works with PRIMARY subfield ID: {subfield_id}")
-            page = 1
-            while True:
-                print(f"  Fetching subfield page {page}...")
-                works_query = Works().filter(
-                    **{"primary_topic.subfield.id": subfield_id, "from_publication_date": date_from}
-                )
-                works = works_query.get(per_page=per_page, page=page)
-                
-                if not works or len(works) == 0:
-                    break
-                
+        # Fetch works for field and subfield if available (using PRIMARY topic filters).
+        # Each query's cursor pages come in sequence, but the two queries are independent
+        # and run side by side.
+        queries = [
+            (label, {filter_key: topic_id, "from_publication_date": date_from})
+            for label, filter_key, topic_id in (
+                ("field", "primary_topic.field.id", field_id),
+                ("subfield", "primary_topic.subfield.id", subfield_id),
+            )
+            if topic_id
+        ]
+        for label, filters in queries:
+            print(f"Fetching works with PRIMARY {label} filter: {filters}")
+        
+        with ThreadPoolExecutor(max_workers=max(len(queries), 1)) as executor:
+            futures = [executor.submit(self.fetch_pages, filters, label, per_page) for label, filters in queries]
+        
+        for (label, _), future in zip(queries, futures):
+            for page, works in enumerate(future.result(), start=1):
                 # Add unique works
-                for work in works:
-                    work_id = work.get('id')
-                    if work_id and work_id not in seen_ids:
-                        seen_ids.add(work_id)
-                        all_works.append(work)
+                all_works_by_id.update({work['id']: work for work in works if work.get('id')})
                 
-                print(f"    Found {len(works)} works on page {page} (unique total so far: {len(all_works)})")
-                
-                if len(works) < per_page:
-                    break
-                page += 1
+                print(f"    Found {len(works)} works on {label} page {page} (unique total so far: {len(all_works_by_id)})")
         
+        all_works = list(all_works_by_id.values())
         print(f"Total unique works fetched: {len(all_works)}")
         return all_works
     
@@ -212,24 +498,36 @@ class PapersDataPipeline:
     # Step 2: Create the DB table if needed
     # =============================================================================
     
-    def table_exists(self) -> bool:
-        """Check if the papers table exists in the database."""
-        with DatabaseConnection.get_cursor() as cur:
-            cur.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'papers'
-                );
-            """)
-            result = cur.fetchone()
-            return result[0] if result else False
+    def table_exists(self, cur=None) -> bool:
+        """
+        Check if the papers table exists in the database.
+        
+        Args:
+            cur: Cursor to run the query on (e.g. from DatabaseConnection.get_session).
+                If None, a pooled cursor is opened for the check.
+        """
+        if cur is None:
+            # Read-only, so the cursor runs in autocommit and skips the COMMIT
+            with DatabaseConnection.get_cursor(readonly=True) as own_cur:
+                return self.table_exists(own_cur)
+        
+        # Direct catalog lookup (NULL when missing) instead of the information_schema view
+        cur.execute("SELECT to_regclass('public.papers') IS NOT NULL;")
+        return cur.fetchone()[0]
     
-    def create_pg_trgm_extension(self):
-        """Create the pg_trgm extension if it doesn't exist."""
+    def create_extensions(self):
+        """Create the pg_trgm extension, and the tdigest extension if the server provides it."""
         with DatabaseConnection.get_cursor() as cur:
             cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
             print("✓ pg_trgm extension checked/created")
+            
+            # tdigest is optional: when installed, the dashboard medians use it instead of an exact sort
+            cur.execute("SELECT EXISTS (SELECT FROM pg_available_extensions WHERE name = 'tdigest');")
+            if cur.fetchone()[0]:
+                cur.execute("CREATE EXTENSION IF NOT EXISTS tdigest;")
+                print("✓ tdigest extension checked/created")
+            else:
+                print("ℹ tdigest extension not available; dashboard medians will be computed exactly")
     
     def create_papers_table(self):
         """Create the papers table with all columns."""
@@ -242,13 +540,15 @@ class PapersDataPipeline:
             
             -- Basic paper information
             title TEXT NOT NULL,
+            title_short VARCHAR(200) GENERATED ALWAYS AS (substring(lower(title), 1, 200)) STORED,  -- trigram search key
+            title_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', title)) STORED,  -- full-text search
             paper_type VARCHAR(50),  -- article, etc.
             publication_date DATE,
             publication_year INTEGER,
             
             -- Primary topic/classification (flattened from nested structure)
             primary_topic_name VARCHAR(255),
-            primary_topic_score DECIMAL(10, 8),
+            primary_topic_score DOUBLE PRECISION,
             subfield_name VARCHAR(255),  -- e.g., "Artificial Intelligence"
             field_name VARCHAR(255),     -- e.g., "Computer Science"
             domain_name VARCHAR(255),
@@ -259,12 +559,12 @@ class PapersDataPipeline:
             
             -- Citation metrics (quantitative)
             cited_by_count INTEGER DEFAULT 0,
-            citation_percentile DECIMAL(10, 8),  -- 0.0 to 1.0
+            citation_percentile DOUBLE PRECISION,  -- 0.0 to 1.0
             is_top_1_percent BOOLEAN,
             is_top_10_percent BOOLEAN,
             citation_percentile_min INTEGER,  -- min percentile year
             citation_percentile_max INTEGER,  -- max percentile year
-            fwci DECIMAL(10, 8),  -- Field-Weighted Citation Impact
+            fwci DOUBLE PRECISION,  -- Field-Weighted Citation Impact
             
             -- Collaboration metrics (quantitative)
             countries_count INTEGER DEFAULT 0,
@@ -273,7 +573,7 @@ class PapersDataPipeline:
             -- Metadata
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
+        ) WITH (fillfactor = 85, autovacuum_vacuum_scale_factor = 0.02);
         """
         
         with DatabaseConnection.get_cursor() as cur:
@@ -283,39 +583,52 @@ class PapersDataPipeline:
     def create_indexes(self):
         """Create all indexes for the papers table."""
         indexes = [
-            ("idx_papers_publication_date", "CREATE INDEX idx_papers_publication_date ON papers(publication_date);"),
-            ("idx_papers_publication_year", "CREATE INDEX idx_papers_publication_year ON papers(publication_year);"),
-            ("idx_papers_cited_by_count", "CREATE INDEX idx_papers_cited_by_count ON papers(cited_by_count);"),
-            ("idx_papers_oa_status", "CREATE INDEX idx_papers_oa_status ON papers(oa_status);"),
-            ("idx_papers_subfield", "CREATE INDEX idx_papers_subfield ON papers(subfield_name);"),
-            ("idx_papers_field", "CREATE INDEX idx_papers_field ON papers(field_name);"),
-            ("idx_papers_primary_topic", "CREATE INDEX idx_papers_primary_topic ON papers(primary_topic_name);"),
-            ("idx_papers_citation_percentile", "CREATE INDEX idx_papers_citation_percentile ON papers(citation_percentile);"),
-            ("idx_papers_fwci", "CREATE INDEX idx_papers_fwci ON papers(fwci);"),
-            ("idx_papers_title_trgm", "CREATE INDEX idx_papers_title_trgm ON papers USING gin(title gin_trgm_ops);"),
+            ("idx_papers_publication_date", "CREATE INDEX IF NOT EXISTS idx_papers_publication_date ON papers(publication_date);"),
+            ("idx_papers_pubdate_brin", "CREATE INDEX IF NOT EXISTS idx_papers_pubdate_brin ON papers USING brin(publication_date) WITH (pages_per_range = 32);"),
+            ("idx_papers_publication_year", "CREATE INDEX IF NOT EXISTS idx_papers_publication_year ON papers(publication_year);"),
+            ("idx_papers_top_cited", "CREATE INDEX IF NOT EXISTS idx_papers_top_cited ON papers(cited_by_count DESC) INCLUDE (publication_year, field_name, subfield_name, oa_status, citation_percentile) WHERE cited_by_count IS NOT NULL;"),
+            ("idx_papers_primary_topic", "CREATE INDEX IF NOT EXISTS idx_papers_primary_topic ON papers(primary_topic_name);"),
+            ("idx_papers_citation_percentile", "CREATE INDEX IF NOT EXISTS idx_papers_citation_percentile ON papers(citation_percentile);"),
+            ("idx_papers_fwci", "CREATE INDEX IF NOT EXISTS idx_papers_fwci ON papers(fwci);"),
+            ("idx_papers_top1", "CREATE INDEX IF NOT EXISTS idx_papers_top1 ON papers(id) WHERE is_top_1_percent;"),
+            ("idx_papers_top10", "CREATE INDEX IF NOT EXISTS idx_papers_top10 ON papers(id) WHERE is_top_10_percent;"),
+            ("idx_papers_empty_title", "CREATE INDEX IF NOT EXISTS idx_papers_empty_title ON papers(id) WHERE title IS NULL OR title = '';"),
+            ("idx_papers_negative_counts", "CREATE INDEX IF NOT EXISTS idx_papers_negative_counts ON papers(id) WHERE cited_by_count < 0 OR countries_count < 0 OR institutions_count < 0;"),
+            ("idx_papers_invalid_scores", "CREATE INDEX IF NOT EXISTS idx_papers_invalid_scores ON papers(id) WHERE citation_percentile < 0.0 OR citation_percentile > 1.0 OR primary_topic_score < 0.0 OR primary_topic_score > 1.0 OR fwci < 0.0;"),
+            ("idx_papers_doi", "CREATE INDEX IF NOT EXISTS idx_papers_doi ON papers(doi) WHERE doi IS NOT NULL AND doi != '';"),
+            ("idx_papers_title_short_trgm", "CREATE INDEX IF NOT EXISTS idx_papers_title_short_trgm ON papers USING gin(title_short gin_trgm_ops);"),
+            ("idx_papers_title_tsv", "CREATE INDEX IF NOT EXISTS idx_papers_title_tsv ON papers USING gin(title_tsv);"),
         ]
         
         with DatabaseConnection.get_cursor() as cur:
+            # Every existing index in one query instead of one lookup per index
+            cur.execute("""
+                SELECT indexname FROM pg_indexes 
+                WHERE schemaname = 'public' 
+                AND tablename = 'papers';
+            """)
+            existing = {row[0] for row in cur.fetchall()}
+            
+            missing = []
             for idx_name, idx_sql in indexes:
-                # Check if index already exists
-                cur.execute("""
-                    SELECT EXISTS (
-                        SELECT FROM pg_indexes 
-                        WHERE schemaname = 'public' 
-                        AND indexname = %s
-                    );
-                """, (idx_name,))
-                exists = cur.fetchone()[0]
-                
-                if exists:
+                if idx_name in existing:
                     print(f"  - Index already exists: {idx_name}")
                 else:
-                    try:
-                        cur.execute(idx_sql)
-                        print(f"  ✓ Created index: {idx_name}")
-                    except Exception as e:
-                        print(f"  ✗ Failed to create index {idx_name}: {e}")
-                        raise
+                    missing.append((idx_name, idx_sql))
+            
+            if not missing:
+                return
+            
+            # All missing indexes in one round-trip and one transaction; IF NOT EXISTS
+            # covers an index created concurrently since the lookup
+            try:
+                cur.execute("\n".join(idx_sql for _, idx_sql in missing))
+            except Exception as e:
+                print(f"  ✗ Failed to create indexes: {e}")
+                raise
+            
+            for idx_name, _ in missing:
+                print(f"  ✓ Created index: {idx_name}")
     
     def add_comments(self):
         """Add comments to the table and key columns."""
@@ -328,8 +641,12 @@ class PapersDataPipeline:
         ]
         
         with DatabaseConnection.get_cursor() as cur:
-            for obj_type, obj_name, comment_text in comments:
-                cur.execute(f"COMMENT ON {obj_type} {obj_name} IS %s;", (comment_text,))
+            # All comments in one round-trip
+            cur.execute(
+                "\n".join(f"COMMENT ON {obj_type} {obj_name} IS %s;" for obj_type, obj_name, _ in comments),
+                [comment_text for _, _, comment_text in comments]
+            )
+            for _, obj_name, _ in comments:
                 print(f"  ✓ Added comment to {obj_name}")
     
     def create_table_if_needed(self):
@@ -341,11 +658,13 @@ class PapersDataPipeline:
         # Check if table already exists
         if self.table_exists():
             print("ℹ Papers table already exists. Skipping creation.")
+            # test_papers_data.py needs validate_papers() at the current version
+            install_validate_function()
             return
         
-        # Create pg_trgm extension (needed for text search index)
-        print("\n1. Checking pg_trgm extension...")
-        self.create_pg_trgm_extension()
+        # Create extensions (pg_trgm is needed for the text search index)
+        print("\n1. Checking extensions...")
+        self.create_extensions()
         
         # Create the table
         print("\n2. Creating papers table...")
@@ -355,10 +674,18 @@ class PapersDataPipeline:
         print("\n3. Creating indexes...")
         self.create_indexes()
         
+        # Mark the clustering index so CLUSTER after a bulk load keeps rows in date order
+        with DatabaseConnection.get_cursor() as cur:
+            cur.execute(CLUSTER_ON_SQL)
+        
         # Add comments
         print("\n4. Adding table and column comments...")
         self.add_comments()
         
+        # Install the function the data quality validator runs
+        print("\n5. Installing data quality function...")
+        install_validate_function()
+        
         print("\n✓ Database table setup complete!")
     
     # =============================================================================
@@ -369,10 +696,8 @@ class PapersDataPipeline:
         """Extract DOI from paper data."""
         doi = paper.get('doi')
         if doi:
-            # Remove 'https://doi.org/' prefix if present
-            if doi.startswith('https://doi.org/'):
-                return doi.replace('https://doi.org/', '')
-            return doi
+            # Remove 'https://doi.org/' prefix if present (a length check and one slice)
+            return doi.removeprefix('https://doi.org/')
         return None
     
     def process_paper(self, paper: Dict[str, Any]) -> tuple:
@@ -382,53 +707,58 @@ class PapersDataPipeline:
         Returns:
             Tuple of values in the order of database columns
         """
+        # Flat fields in one call; OpenAlex works normally carry all of them, so the
+        # None-defaulting copy is only made for the rare work missing one
+        try:
+            flat = _flat_getter(paper)
+        except KeyError:
+            flat = _flat_getter(defaultdict(_none, paper))
+        (work_id, title, display_name, paper_type, publication_date, publication_year,
+         cited_by_count, countries_count, institutions_count) = flat
+        
+        # Bound once: the nested lookups below all go through it
+        paper_get = paper.get
+        
         # Identifiers
-        openalex_id = paper.get('id', '').replace('https://openalex.org/', '')
+        openalex_id = (work_id or '').removeprefix('https://openalex.org/')
         doi = self.extract_doi(paper)
         
         # Basic information
-        title = paper.get('title', '') or paper.get('display_name', '')
-        paper_type = paper.get('type')
-        publication_date = paper.get('publication_date')
-        publication_year = paper.get('publication_year')
-        
-        # Primary topic (flattened)
-        primary_topic = paper.get('primary_topic', {})
-        primary_topic_name = primary_topic.get('display_name') if primary_topic else None
-        primary_topic_score = primary_topic.get('score') if primary_topic else None
-        
-        subfield = primary_topic.get('subfield', {}) if primary_topic else {}
-        subfield_name = subfield.get('display_name') if subfield else None
-        
-        field = primary_topic.get('field', {}) if primary_topic else {}
-        field_name = field.get('display_name') if field else None
-        
-        domain = primary_topic.get('domain', {}) if primary_topic else {}
-        domain_name = domain.get('display_name') if domain else None
+        title = title or display_name
+        
+        # Primary topic (flattened). Missing or null nested objects become the shared
+        # _EMPTY dict, so each lookup below is a single get with no truthiness branch.
+        primary_topic = paper_get('primary_topic') or _EMPTY
+        topic_get = primary_topic.get
+        primary_topic_name = topic_get('display_name')
+        primary_topic_score = topic_get('score')
+        subfield_name = (topic_get('subfield') or _EMPTY).get('display_name')
+        field_name = (topic_get('field') or _EMPTY).get('display_name')
+        domain_name = (topic_get('domain') or _EMPTY).get('display_name')
         
         # Open Access information
-        open_access = paper.get('open_access', {})
-        is_open_access = open_access.get('is_oa', False) if open_access else False
-        oa_status = open_access.get('oa_status') if open_access else None
+        open_access = paper_get('open_access') or _EMPTY
+        is_open_access = open_access.get('is_oa', False)
+        oa_status = open_access.get('oa_status')
         
         # Citation metrics
-        cited_by_count = paper.get('cited_by_count', 0) or 0
+        cited_by_count = cited_by_count or 0
         
-        citation_normalized = paper.get('citation_normalized_percentile', {})
-        citation_percentile = citation_normalized.get('value') if citation_normalized else None
-        is_top_1_percent = citation_normalized.get('is_in_top_1_percent', False) if citation_normalized else False
-        is_top_10_percent = citation_normalized.get('is_in_top_10_percent', False) if citation_normalized else False
+        citation_normalized = paper_get('citation_normalized_percentile') or _EMPTY
+        citation_percentile = citation_normalized.get('value')
+        is_top_1_percent = citation_normalized.get('is_in_top_1_percent', False)
+        is_top_10_percent = citation_normalized.get('is_in_top_10_percent', False)
         
-        cited_by_percentile_year = paper.get('cited_by_percentile_year', {})
-        citation_percentile_min = cited_by_percentile_year.get('min') if cited_by_percentile_year else None
-        citation_percentile_max = cited_by_percentile_year.get('max') if cited_by_percentile_year else None
+        cited_by_percentile_year = paper_get('cited_by_percentile_year') or _EMPTY
+        citation_percentile_min = cited_by_percentile_year.get('min')
+        citation_percentile_max = cited_by_percentile_year.get('max')
         
         # FWCI (Field-Weighted Citation Impact) - not directly in JSON, set to None
         fwci = None
         
         # Collaboration metrics
-        countries_count = paper.get('countries_distinct_count', 0) or 0
-        institutions_count = paper.get('institutions_distinct_count', 0) or 0
+        countries_count = countries_count or 0
+        institutions_count = institutions_count or 0
         
         return (
             openalex_id,
@@ -455,117 +785,183 @@ class PapersDataPipeline:
             institutions_count
         )
     
-    def insert_papers_with_deduplication(self, papers: List[Dict[str, Any]]) -> int:
+    def insert_papers_with_deduplication(self, papers: List[Dict[str, Any]],
+                                         bulk_mode: Optional[bool] = None) -> int:
         """
         Insert papers into database with deduplication.
         Uses ON CONFLICT to skip duplicates based on openalex_id.
+        
+        Each transaction's papers are COPY'd into a temporary staging table and merged
+        with one INSERT ... SELECT ... ON CONFLICT. If a merge fails, its papers are
+        retried with the batched upsert, which isolates the bad rows.
+        
+        Args:
+            papers: List of paper dicts from OpenAlex
+            bulk_mode: If True, drop the secondary indexes for the load and rebuild them
+                afterwards (see secondary_indexes_dropped). If None, enabled when there
+                are more than BULK_LOAD_THRESHOLD papers.
         """
-        insert_sql = """
-        INSERT INTO papers (
-            openalex_id, doi, title, paper_type, publication_date, publication_year,
-            primary_topic_name, primary_topic_score, subfield_name, field_name, domain_name,
-            is_open_access, oa_status,
-            cited_by_count, citation_percentile, is_top_1_percent, is_top_10_percent,
-            citation_percentile_min, citation_percentile_max, fwci,
-            countries_count, institutions_count,
-            updated_at
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s,
-            %s, %s,
-            %s, %s, %s, %s,
-            %s, %s, %s,
-            %s, %s,
-            CURRENT_TIMESTAMP
-        )
-        ON CONFLICT (openalex_id) 
-        DO UPDATE SET
-            doi = EXCLUDED.doi,
-            title = EXCLUDED.title,
-            paper_type = EXCLUDED.paper_type,
-            publication_date = EXCLUDED.publication_date,
-            publication_year = EXCLUDED.publication_year,
-            primary_topic_name = EXCLUDED.primary_topic_name,
-            primary_topic_score = EXCLUDED.primary_topic_score,
-            subfield_name = EXCLUDED.subfield_name,
-            field_name = EXCLUDED.field_name,
-            domain_name = EXCLUDED.domain_name,
-            is_open_access = EXCLUDED.is_open_access,
-            oa_status = EXCLUDED.oa_status,
-            cited_by_count = EXCLUDED.cited_by_count,
-            citation_percentile = EXCLUDED.citation_percentile,
-            is_top_1_percent = EXCLUDED.is_top_1_percent,
-            is_top_10_percent = EXCLUDED.is_top_10_percent,
-            citation_percentile_min = EXCLUDED.citation_percentile_min,
-            citation_percentile_max = EXCLUDED.citation_percentile_max,
-            fwci = EXCLUDED.fwci,
-            countries_count = EXCLUDED.countries_count,
-            institutions_count = EXCLUDED.institutions_count,
-            updated_at = CURRENT_TIMESTAMP;
-        """
+        # Prepared once per server session and executed once per batch, so the upsert is
+        # parsed and planned once instead of per batch
+        statement_name, prepare_sql, execute_sql = _UPSERT_STATEMENT
         
-        processed_papers = []
         skipped = 0
         
         print(f"\nProcessing {len(papers)} papers...")
         
-        for paper in papers:
-            try:
-                processed = self.process_paper(paper)
-                # Validate that openalex_id is not empty
-                if not processed[0]:
+        process_paper = self.process_paper
+        try:
+            # process_paper tolerates missing fields, so normally one pass with no
+            # per-paper exception handling processes everything
+            processed = [process_paper(paper) for paper in papers]
+        except Exception:
+            # A malformed paper: redo the pass one paper at a time to skip only those
+            processed = []
+            for paper in papers:
+                try:
+                    processed.append(process_paper(paper))
+                except Exception as e:
+                    print(f"  Warning: Error processing paper {paper.get('id', 'unknown')}: {e}")
                     skipped += 1
-                    continue
-                processed_papers.append(processed)
-            except Exception as e:
-                print(f"  Warning: Error processing paper {paper.get('id', 'unknown')}: {e}")
-                skipped += 1
-                continue
+        
+        # Validate that openalex_id is not empty
+        processed_papers = [row for row in processed if row[0]]
+        skipped += len(processed) - len(processed_papers)
+        
+        # Keep one row per openalex_id (the last, as one upsert per row would), so the
+        # chunks below touch disjoint rows even when the caller passes duplicates
+        by_id = {row[0]: row for row in processed_papers}
+        duplicates = len(processed_papers) - len(by_id)
+        if duplicates > 0:
+            print(f"  Merged {duplicates} duplicate papers by openalex_id")
+            processed_papers = list(by_id.values())
         
         if skipped > 0:
             print(f"  Skipped {skipped} papers due to errors or missing openalex_id")
         
         print(f"  Processed {len(processed_papers)} papers for insertion")
         
-        # Insert in batches
-        total_inserted = 0
+        if bulk_mode is None:
+            bulk_mode = len(processed_papers) > BULK_LOAD_THRESHOLD
         
-        with DatabaseConnection.get_connection_context() as conn:
-            cur = conn.cursor()
-            
-            for i in range(0, len(processed_papers), self.batch_size):
-                batch = processed_papers[i:i + self.batch_size]
+        # Batch-aligned contiguous chunks, one per worker. The papers are unique by
+        # openalex_id, so the chunks touch disjoint rows and each can be upserted on its
+        # own pooled connection while the others wait on the server.
+        chunk_size = max(-(-len(processed_papers) // (self.batch_size * INSERT_WORKERS)), 1) * self.batch_size
+        
+        def insert_chunk(start):
+            """Insert processed_papers[start:start + chunk_size]; return how many papers were written."""
+            with DatabaseConnection.get_connection_context() as conn:
+                cur = conn.cursor()
+                # Papers written since the last commit
+                uncommitted = 0
                 
-                try:
-                    # Use executemany for batch insertion
-                    cur.executemany(insert_sql, batch)
-                    conn.commit()
+                def begin_if_needed():
+                    """Set up a new transaction before its first statement."""
+                    if conn.info.transaction_status == TRANSACTION_STATUS_IDLE:
+                        # Asynchronous commit for this load only (SET LOCAL): a crash can lose the
+                        # last few commits, and re-running the load is idempotent (ON CONFLICT).
+                        # The transaction-mode pooler only pins a server session for one transaction,
+                        # so check in the same round-trip whether this one has the upsert prepared.
+                        cur.execute(
+                            "SET LOCAL synchronous_commit = off;"
+                            "SELECT EXISTS (SELECT FROM pg_prepared_statements WHERE name = %s);",
+                            (statement_name,)
+                        )
+                        if not cur.fetchone()[0]:
+                            cur.execute(prepare_sql)
+                
+                def upsert(rows):
+                    """
+                    Upsert rows with one EXECUTE of the prepared statement (one array per column).
                     
-                    batch_size_actual = len(batch)
-                    total_inserted += batch_size_actual
+                    The EXECUTE runs inside a savepoint set in the same round-trip, so a failure
+                    can be undone with ROLLBACK TO SAVEPOINT batch_sp without losing the rest of
+                    the open transaction.
+                    """
+                    cur.execute(
+                        "SAVEPOINT batch_sp; " + execute_sql + "; RELEASE SAVEPOINT batch_sp;",
+                        [list(column) for column in zip(*rows)]
+                    )
+                
+                def write_batch(rows, number):
+                    """Write a batch in the open transaction; return how many papers were written."""
+                    nonlocal uncommitted
+                    begin_if_needed()
+                    try:
+                        # One EXECUTE per batch instead of one statement per paper
+                        upsert(rows)
+                        print(f"  Inserted/updated batch {number} ({len(rows)} papers)")
+                        written = len(rows)
                     
-                    print(f"  Inserted/updated batch {i//self.batch_size + 1} ({batch_size_actual} papers)")
+                    except Exception as e:
+                        # Only this batch is undone; earlier batches in the transaction are kept
+                        cur.execute("ROLLBACK TO SAVEPOINT batch_sp;")
+                        print(f"  Error inserting batch {number}: {e}")
+                        # Try inserting one by one to identify problematic records
+                        written = 0
+                        for paper_data in rows:
+                            try:
+                                upsert([paper_data])
+                                written += 1
+                            except Exception as e2:
+                                cur.execute("ROLLBACK TO SAVEPOINT batch_sp;")
+                                print(f"    Failed to insert paper {paper_data[0]}: {e2}")
                     
-                except Exception as e:
-                    conn.rollback()
-                    print(f"  Error inserting batch {i//self.batch_size + 1}: {e}")
-                    # Try inserting one by one to identify problematic records
-                    for paper_data in batch:
-                        try:
-                            cur.execute(insert_sql, paper_data)
-                            conn.commit()
-                            total_inserted += 1
-                        except Exception as e2:
-                            conn.rollback()
-                            print(f"    Failed to insert paper {paper_data[0]}: {e2}")
-            
-            cur.close()
+                    # One commit per COMMIT_INTERVAL papers instead of one per batch
+                    uncommitted += len(rows)
+                    if uncommitted >= COMMIT_INTERVAL:
+                        conn.commit()
+                        uncommitted = 0
+                    return written
+                
+                def merge(rows):
+                    """COPY rows into a staging table and merge them with one statement, then commit."""
+                    cur.execute("SET LOCAL synchronous_commit = off;" + STAGING_TABLE_SQL)
+                    copy_to_staging(cur, rows)
+                    cur.execute(_MERGE_SQL)
+                    conn.commit()
+                
+                inserted = 0
+                stop = min(start + chunk_size, len(processed_papers))
+                # One staged merge per COMMIT_INTERVAL papers; if it fails, that transaction's
+                # papers fall back to the batch upsert, which isolates the bad rows
+                for i in range(start, stop, COMMIT_INTERVAL):
+                    rows = processed_papers[i:min(i + COMMIT_INTERVAL, stop)]
+                    try:
+                        merge(rows)
+                        print(f"  Merged {len(rows)} papers through staging")
+                        inserted += len(rows)
+                    except Exception as e:
+                        conn.rollback()
+                        print(f"  Error merging staged papers, retrying in batches: {e}")
+                        for j in range(i, i + len(rows), self.batch_size):
+                            batch = processed_papers[j:min(j + self.batch_size, stop)]
+                            inserted += write_batch(batch, j // self.batch_size + 1)
+                        # Commit the recovered papers so a later failed merge cannot roll them back
+                        conn.commit()
+                        uncommitted = 0
+                
+                conn.commit()
+                cur.close()
+            return inserted
+        
+        with secondary_indexes_dropped(bulk_mode), ThreadPoolExecutor(max_workers=INSERT_WORKERS) as executor:
+            total_inserted = sum(executor.map(insert_chunk, range(0, len(processed_papers), chunk_size)))
         
         print(f"\n✓ Successfully processed {total_inserted} papers")
         return total_inserted
     
-    def upload_papers(self, papers: Optional[List[Dict[str, Any]]] = None) -> int:
-        """Upload papers to the database."""
+    def upload_papers(self, papers: Optional[List[Dict[str, Any]]] = None,
+                      bulk_mode: Optional[bool] = None) -> int:
+        """
+        Upload papers to the database.
+        
+        Args:
+            papers: Papers to upload (default: the papers from query_api)
+            bulk_mode: Drop and rebuild the secondary indexes around the upload
+                (see insert_papers_with_deduplication). If None, decided by size.
+        """
         print("\n" + "=" * 70)
         print("STEP 3: Uploading Papers to Database")
         print("=" * 70)
@@ -577,261 +973,243 @@ class PapersDataPipeline:
             print("⚠ No papers to upload.")
             return 0
         
-        return self.insert_papers_with_deduplication(papers)
+        return self.insert_papers_with_deduplication(papers, bulk_mode=bulk_mode)
     
     # =============================================================================
     # Step 4: Run data quality tests
     # =============================================================================
     
-    def run_test(self, test_name: str, query: str, description: str, 
-                 expect_zero: bool = True) -> Dict[str, Any]:
+    def table_fingerprint(self, cur) -> Optional[list]:
         """
-        Run a single test query.
+        Fingerprint the current contents of the papers table.
         
         Args:
-            test_name: Name of the test
-            query: SQL query to execute
-            description: Human-readable description
-            expect_zero: If True, test passes when result is 0. If False, test passes when result > 0.
+            cur: Autocommit cursor to run the query on
         
         Returns:
-            Dictionary with test results
+            JSON-serializable [row count, max openalex_id, max updated_at],
+            or None if the query fails
         """
         try:
-            with DatabaseConnection.get_cursor(dict_cursor=True) as cur:
-                cur.execute(query)
-                result = cur.fetchone()
-                
-                # Get the first value from the result (count or similar)
-                count = list(result.values())[0] if result else 0
-                
-                # Determine if test passed
-                passed = (count == 0) if expect_zero else (count > 0)
-                
-                if passed:
-                    status = "✓ PASS"
-                else:
-                    status = "✗ FAIL"
-                
-                test_result = {
-                    'name': test_name,
-                    'status': status,
-                    'description': description,
-                    'count': count,
-                    'passed': passed
-                }
-                
-                return test_result
-                
+            cur.execute(_FINGERPRINT_QUERY)
+            count, max_id, max_updated_at = cur.fetchone()
         except Exception as e:
-            test_result = {
-                'name': test_name,
-                'status': '✗ ERROR',
-                'description': description,
-                'error': str(e),
-                'passed': False
-            }
-            return test_result
+            print(f"  Note: could not fingerprint the papers table: {e}")
+            return None
+        return [count, max_id, max_updated_at.isoformat() if max_updated_at else None]
     
-    def run_data_quality_tests(self) -> int:
-        """Run all data quality tests."""
-        print("\n" + "=" * 70)
-        print("STEP 4: Running Data Quality Tests")
-        print("=" * 70)
-        
-        # Check if table exists
-        if not self.table_exists():
-            print("\n✗ ERROR: 'papers' table does not exist in the database.")
-            print("Please create the table first.")
-            return 1
+    def read_quality_cache(self, cache_key: list):
+        """
+        Return the results stored by the last passing run if they are for cache_key.
         
-        # Get total record count
-        with DatabaseConnection.get_cursor() as cur:
-            cur.execute("SELECT COUNT(*) FROM papers;")
-            total_count = cur.fetchone()[0]
-            print(f"\nTotal records in papers table: {total_count:,}")
+        Args:
+            cache_key: _CHECKS_VERSION followed by the current table fingerprint
         
-        results = []
-        total_tests = 0
-        passed_tests = 0
-        failed_tests = 0
+        Returns:
+            Tuple of (total row count, list of TestResult), or None if there is no
+            cache, it is unreadable, or it was stored for other checks or data
+        """
+        try:
+            with open(QUALITY_CACHE_FILE, encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache['key'] != cache_key:
+                return None
+            return cache['total_count'], [TestResult(**test) for test in cache['results']]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    
+    def write_quality_cache(self, cache_key: list, total_count: int, results: List[TestResult]):
+        """Store the results of a run where every data quality test passed."""
+        try:
+            os.makedirs(os.path.dirname(QUALITY_CACHE_FILE), exist_ok=True)
+            with open(QUALITY_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'key': cache_key,
+                    'total_count': total_count,
+                    'results': [test._asdict() for test in results],
+                }, f)
+        except OSError as e:
+            print(f"  Note: could not cache data quality results: {e}")
+    
+    def write_results_jsonl(self, path: str, results: List[TestResult]):
+        """
+        Write test results as JSON lines (one object per test, in check order).
         
-        # Test 1: Missing Required Fields
-        print("\n" + "=" * 70)
-        print("TEST 1: Missing Required Fields")
-        print("=" * 70)
+        passed is reported as in the console summary, where an informational check
+        always counts as passed; its raw outcome is still visible in count.
         
-        test = self.run_test(
-            test_name="Missing openalex_id",
-            query="""
-                SELECT COUNT(*) as count
-                FROM papers
-                WHERE openalex_id IS NULL OR openalex_id = '';
-            """,
-            description="Papers with NULL or empty openalex_id (required field)"
-        )
-        results.append(test)
-        total_tests += 1
-        if test['passed']:
-            passed_tests += 1
-        else:
-            failed_tests += 1
-        print(f"\n{test['status']} - {test['name']}")
-        print(f"  {test['description']}")
-        if 'error' in test:
-            print(f"  Error: {test['error']}")
-        else:
-            print(f"  Found: {test['count']} record(s)")
-        
-        test = self.run_test(
-            test_name="Missing title",
-            query="""
-                SELECT COUNT(*) as count
-                FROM papers
-                WHERE title IS NULL OR title = '';
-            """,
-            description="Papers with NULL or empty title (required field)"
+        Args:
+            path: Output file path (overwritten)
+            results: TestResults from run_checks
+        """
+        records = (
+            dict(test._asdict(), passed=test.passed or check.informational,
+                 informational=check.informational)
+            for check, test in zip(DATA_QUALITY_CHECKS, results)
         )
-        results.append(test)
-        total_tests += 1
-        if test['passed']:
-            passed_tests += 1
-        else:
-            failed_tests += 1
-        print(f"\n{test['status']} - {test['name']}")
-        print(f"  {test['description']}")
-        if 'error' in test:
-            print(f"  Error: {test['error']}")
-        else:
-            print(f"  Found: {test['count']} record(s)")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("".join(json.dumps(record) + "\n" for record in records))
+            print(f"✓ Wrote {len(results)} test result(s) to {path}")
+        except OSError as e:
+            print(f"⚠ Could not write test results to {path}: {e}")
+    
+    def run_checks(self, cur):
+        """
+        Run every check in DATA_QUALITY_CHECKS with a single query.
+        
+        Args:
+            cur: Autocommit cursor to run the query on
+        
+        Returns:
+            Tuple of (total row count, list of TestResult in check order).
+            If the query fails, the count is None and every test carries the error.
+        """
+        try:
+            cur.execute(_CHECKS_QUERY)
+            row = cur.fetchone()
+        except Exception as e:
+            return None, [
+                TestResult(check.name, check.description, None, False, str(e))
+                for check in DATA_QUALITY_CHECKS
+            ]
+        
+        return row[0], [
+            TestResult(check.name, check.description, count, count == 0, None)
+            for check, count in zip(DATA_QUALITY_CHECKS, row[1:])
+        ]
+    
+    def run_data_quality_tests(self, force: bool = False, quiet: bool = False,
+                               results_path: Optional[str] = None) -> int:
+        """
+        Run all data quality tests.
+        
+        When neither the papers table (same fingerprint) nor the checks have changed
+        since the last run where every test passed, the queries are skipped and that
+        run's results are reported (and written to results_path) again.
         
-        # Test 2: Citation Count Validation
+        Args:
+            force: If True, run the tests even when the table is unchanged
+            quiet: If True, only failing tests and the summary are reported
+            results_path: If set, each TestResult is also written to this file as one
+                JSON object per line
+        
+        Returns:
+            Exit code (0 if all tests passed, 1 otherwise)
+        """
         print("\n" + "=" * 70)
-        print("TEST 2: Citation Count Validation")
+        print("STEP 4: Running Data Quality Tests")
         print("=" * 70)
         
-        for test_name, query, desc in [
-            ("Negative cited_by_count",
-             "SELECT COUNT(*) as count FROM papers WHERE cited_by_count < 0;",
-             "Papers with negative cited_by_count (should be >= 0)"),
-            ("Negative countries_count",
-             "SELECT COUNT(*) as count FROM papers WHERE countries_count < 0;",
-             "Papers with negative countries_count (should be >= 0)"),
-            ("Negative institutions_count",
-             "SELECT COUNT(*) as count FROM papers WHERE institutions_count < 0;",
-             "Papers with negative institutions_count (should be >= 0)")
-        ]:
-            test = self.run_test(test_name, query, desc)
-            results.append(test)
-            total_tests += 1
-            if test['passed']:
-                passed_tests += 1
+        # One autocommit connection for the existence check, the fingerprint and the checks
+        with DatabaseConnection.get_session() as (conn, cur):
+            # Check if table exists
+            if not self.table_exists(cur):
+                print("\n✗ ERROR: 'papers' table does not exist in the database.")
+                print("Please create the table first.")
+                return 1
+            
+            fingerprint = self.table_fingerprint(cur)
+            cache_key = [_CHECKS_VERSION] + fingerprint if fingerprint is not None else None
+            cached = self.read_quality_cache(cache_key) if cache_key and not force else None
+            
+            if cached is not None:
+                total_count, results = cached
+                print("\nℹ Papers table and checks unchanged since the last passing run; "
+                      "reporting its results (use --force-tests to re-run the queries).")
             else:
-                failed_tests += 1
-                print(f"\n{test['status']} - {test['name']}")
-                print(f"  {test['description']}")
-                if 'error' in test:
-                    print(f"  Error: {test['error']}")
-                else:
-                    print(f"  Found: {test['count']} record(s)")
+                # Total record count and all tests (one round-trip)
+                total_count, results = self.run_checks(cur)
         
-        # Test 3: Score Range Validation
-        print("\n" + "=" * 70)
-        print("TEST 3: Score Range Validation")
-        print("=" * 70)
+        # The report is collected and written with one call at the end
+        lines = []
+        report = lines.append
         
-        for test_name, query, desc in [
-            ("Invalid citation_percentile range",
-             "SELECT COUNT(*) as count FROM papers WHERE citation_percentile IS NOT NULL AND (citation_percentile < 0.0 OR citation_percentile > 1.0);",
-             "Papers with citation_percentile outside valid range [0.0, 1.0]"),
-            ("Invalid primary_topic_score range",
-             "SELECT COUNT(*) as count FROM papers WHERE primary_topic_score IS NOT NULL AND (primary_topic_score < 0.0 OR primary_topic_score > 1.0);",
-             "Papers with primary_topic_score outside valid range [0.0, 1.0]"),
-            ("Negative fwci",
-             "SELECT COUNT(*) as count FROM papers WHERE fwci IS NOT NULL AND fwci < 0;",
-             "Papers with negative fwci (Field-Weighted Citation Impact)")
-        ]:
-            test = self.run_test(test_name, query, desc)
-            results.append(test)
-            total_tests += 1
-            if test['passed']:
+        if total_count is not None:
+            report(f"\nTotal records in papers table: {total_count:,}")
+        
+        total_tests = len(results)
+        passed_tests = 0
+        failed_tests = 0
+        
+        section = None
+        for check, test in zip(DATA_QUALITY_CHECKS, results):
+            passed = test.passed or check.informational
+            if passed:
                 passed_tests += 1
             else:
                 failed_tests += 1
-                print(f"\n{test['status']} - {test['name']}")
-                print(f"  {test['description']}")
-                if 'error' in test:
-                    print(f"  Error: {test['error']}")
-                else:
-                    print(f"  Found: {test['count']} record(s)")
+            
+            if quiet:
+                # Only failures are detailed
+                if passed:
+                    continue
+            else:
+                if check.section != section:
+                    section = check.section
+                    report("\n" + "=" * 70)
+                    report(section)
+                    report("=" * 70)
+                
+                if test.passed and not check.always_report:
+                    continue
+            
+            if test.passed:
+                status = "✓ PASS"
+            else:
+                status = "✗ ERROR" if test.error else "✗ FAIL"
+            report(f"\n{status} - {test.name}")
+            report(f"  {test.description}")
+            if test.error:
+                report(f"  Error: {test.error}")
+            elif check.informational:
+                report(f"  Found: {test.count} {check.unit} (informational)")
+            else:
+                report(f"  Found: {test.count} {check.unit}")
         
-        # Test 4: Duplicate Detection
-        print("\n" + "=" * 70)
-        print("TEST 4: Duplicate Detection")
-        print("=" * 70)
+        # Summary
+        report("\n" + "=" * 70)
+        report("TEST RESULTS SUMMARY")
+        report("=" * 70)
+        report(f"Total Tests: {total_tests}")
+        report(f"Passed: {passed_tests}")
+        report(f"Failed: {failed_tests}")
+        report("-" * 70)
         
-        # Duplicate openalex_id test (must pass)
-        test = self.run_test(
-            test_name="Duplicate openalex_id",
-            query="SELECT COUNT(*) as count FROM (SELECT openalex_id, COUNT(*) as cnt FROM papers WHERE openalex_id IS NOT NULL GROUP BY openalex_id HAVING COUNT(*) > 1) as duplicates;",
-            description="Number of openalex_id values that appear more than once (should be 0)"
-        )
-        results.append(test)
-        total_tests += 1
-        if test['passed']:
-            passed_tests += 1
+        if failed_tests == 0:
+            report("\n✓ All tests passed!")
         else:
-            failed_tests += 1
-            print(f"\n{test['status']} - {test['name']}")
-            print(f"  {test['description']}")
-            if 'error' in test:
-                print(f"  Error: {test['error']}")
-            else:
-                print(f"  Found: {test['count']} record(s)")
+            report(f"\n✗ {failed_tests} test(s) failed. Please review the results above.")
         
-        # Duplicate DOI test (informational - always passes)
-        test = self.run_test(
-            test_name="Duplicate DOI",
-            query="SELECT COUNT(*) as count FROM (SELECT doi, COUNT(*) as cnt FROM papers WHERE doi IS NOT NULL AND doi != '' GROUP BY doi HAVING COUNT(*) > 1) as duplicates;",
-            description="Number of DOI values that appear more than once (informational)"
-        )
-        results.append(test)
-        total_tests += 1
-        # DOI test is informational, so it always counts as passed for the summary
-        passed_tests += 1
-        print(f"\n{test['status']} - {test['name']}")
-        print(f"  {test['description']}")
-        if 'error' in test:
-            print(f"  Error: {test['error']}")
-        else:
-            print(f"  Found: {test['count']} duplicate DOI(s) (informational)")
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
         
-        # Print summary
-        print("\n" + "=" * 70)
-        print("TEST RESULTS SUMMARY")
-        print("=" * 70)
-        print(f"Total Tests: {total_tests}")
-        print(f"Passed: {passed_tests}")
-        print(f"Failed: {failed_tests}")
-        print("-" * 70)
+        if results_path:
+            self.write_results_jsonl(results_path, results)
         
         if failed_tests == 0:
-            print("\n✓ All tests passed!")
+            if cached is None and cache_key is not None:
+                self.write_quality_cache(cache_key, total_count, results)
             return 0
-        else:
-            print(f"\n✗ {failed_tests} test(s) failed. Please review the results above.")
-            return 1
+        return 1
     
     # =============================================================================
     # Main pipeline execution
     # =============================================================================
     
-    def run(self, skip_tests: bool = False) -> int:
+    def run(self, skip_tests: bool = False, bulk_mode: Optional[bool] = None,
+            force_tests: bool = False, quiet: bool = False,
+            results_path: Optional[str] = None) -> int:
         """
         Run the complete pipeline.
         
         Args:
             skip_tests: If True, skip data quality tests (default: False)
+            bulk_mode: Passed to upload_papers (default: decided by the number of papers)
+            force_tests: If True, run the data quality tests even when the table is
+                unchanged since the last passing run (default: False)
+            quiet: If True, the data quality report only details failing tests (default: False)
+            results_path: If set, also write the data quality results there as JSON lines
         
         Returns:
             Exit code (0 for success, 1 for failure)
@@ -848,11 +1226,16 @@ class PapersDataPipeline:
             self.create_table_if_needed()
             
             # Step 3: Upload papers to the database
-            self.upload_papers(papers)
+            self.upload_papers(papers, bulk_mode=bulk_mode)
+            
+            # Refresh the pre-aggregated views read by the dashboard
+            print("\nRefreshing dashboard materialized views...")
+            refresh_dashboard_mviews()
             
             # Step 4: Run data quality tests
             if not skip_tests:
-                exit_code = self.run_data_quality_tests()
+                exit_code = self.run_data_quality_tests(force=force_tests, quiet=quiet,
+                                                        results_path=results_path)
             else:
                 print("\n" + "=" * 70)
                 print("STEP 4: Skipping Data Quality Tests")
@@ -867,7 +1250,6 @@ class PapersDataPipeline:
             
         except Exception as e:
             print(f"\n✗ Pipeline error: {e}")
-            import traceback
             traceback.print_exc()
             return 1
         finally:
@@ -876,8 +1258,6 @@ class PapersDataPipeline:
 
 def main():
     """Main function."""
-    import argparse
-    
     parser = argparse.ArgumentParser(
         description='AI Papers Data Pipeline - Query API, create table, upload papers, and run tests'
     )
@@ -898,11 +1278,35 @@ def main():
         action='store_true',
         help='Skip data quality tests'
     )
+    parser.add_argument(
+        '--force-tests',
+        action='store_true',
+        help='Run data quality tests even if the papers table is unchanged since the last passing run'
+    )
+    parser.add_argument(
+        '--quiet',
+        action='store_true',
+        help='Only report failing data quality tests and the summary'
+    )
+    parser.add_argument(
+        '--results-jsonl',
+        metavar='PATH',
+        help='Also write the data quality test results to PATH as JSON lines'
+    )
+    parser.add_argument(
+        '--bulk-load',
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help='Drop the secondary indexes during the upload and rebuild them afterwards '
+             f'(default: only for more than {BULK_LOAD_THRESHOLD:,} papers)'
+    )
     
     args = parser.parse_args()
     
     pipeline = PapersDataPipeline(days=args.days, batch_size=args.batch_size)
-    exit_code = pipeline.run(skip_tests=args.skip_tests)
+    exit_code = pipeline.run(skip_tests=args.skip_tests, bulk_mode=args.bulk_load,
+                             force_tests=args.force_tests, quiet=args.quiet,
+                             results_path=args.results_jsonl)
     sys.exit(exit_code)
 
 
@@ -9,13 +9,15 @@ CREATE TABLE papers (
     
     -- Basic paper information
     title TEXT NOT NULL,
+    title_short VARCHAR(200) GENERATED ALWAYS AS (substring(lower(title), 1, 200)) STORED,  -- trigram search key
+    title_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', title)) STORED,  -- full-text search
     paper_type VARCHAR(50),  -- article, etc.
     publication_date DATE,
     publication_year INTEGER,
     
     -- Primary topic/classification (flattened from nested structure)
     primary_topic_name VARCHAR(255),
-    primary_topic_score DECIMAL(10, 8),
+    primary_topic_score DOUBLE PRECISION,
     subfield_name VARCHAR(255),  -- e.g., "Artificial Intelligence"
     field_name VARCHAR(255),     -- e.g., "Computer Science"
     domain_name VARCHAR(255),
@@ -26,12 +28,12 @@ CREATE TABLE papers (
     
     -- Citation metrics (quantitative)
     cited_by_count INTEGER DEFAULT 0,
-    citation_percentile DECIMAL(10, 8),  -- 0.0 to 1.0
+    citation_percentile DOUBLE PRECISION,  -- 0.0 to 1.0
     is_top_1_percent BOOLEAN,
     is_top_10_percent BOOLEAN,
     citation_percentile_min INTEGER,  -- min percentile year
     citation_percentile_max INTEGER,  -- max percentile year
-    fwci DECIMAL(10, 8),  -- Field-Weighted Citation Impact
+    fwci DOUBLE PRECISION,  -- Field-Weighted Citation Impact
     
     -- Collaboration metrics (quantitative)
     countries_count INTEGER DEFAULT 0,
@@ -40,21 +42,39 @@ CREATE TABLE papers (
     -- Metadata
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+) WITH (fillfactor = 85, autovacuum_vacuum_scale_factor = 0.02);
 
 -- Indexes for common dashboard queries
 CREATE INDEX idx_papers_publication_date ON papers(publication_date);
+-- Block-range summary for date range scans (rows are CLUSTERed on publication_date)
+CREATE INDEX idx_papers_pubdate_brin ON papers USING brin(publication_date) WITH (pages_per_range = 32);
 CREATE INDEX idx_papers_publication_year ON papers(publication_year);
-CREATE INDEX idx_papers_cited_by_count ON papers(cited_by_count);
-CREATE INDEX idx_papers_oa_status ON papers(oa_status);
-CREATE INDEX idx_papers_subfield ON papers(subfield_name);
-CREATE INDEX idx_papers_field ON papers(field_name);
+-- Covering index for the dashboard's top-cited papers (ORDER BY cited_by_count DESC LIMIT n)
+CREATE INDEX idx_papers_top_cited ON papers(cited_by_count DESC) INCLUDE (publication_year, field_name, subfield_name, oa_status, citation_percentile) WHERE cited_by_count IS NOT NULL;
 CREATE INDEX idx_papers_primary_topic ON papers(primary_topic_name);
 CREATE INDEX idx_papers_citation_percentile ON papers(citation_percentile);
 CREATE INDEX idx_papers_fwci ON papers(fwci);
 
--- Index for text search on titles
-CREATE INDEX idx_papers_title_trgm ON papers USING gin(title gin_trgm_ops);
+-- Small partial indexes answering the top-1% / top-10% counts with index-only scans
+CREATE INDEX idx_papers_top1 ON papers(id) WHERE is_top_1_percent;
+CREATE INDEX idx_papers_top10 ON papers(id) WHERE is_top_10_percent;
+
+-- Partial indexes backing the data quality checks (empty on a clean table) and the DOI duplicate scan
+CREATE INDEX idx_papers_empty_title ON papers(id) WHERE title IS NULL OR title = '';
+CREATE INDEX idx_papers_negative_counts ON papers(id) WHERE cited_by_count < 0 OR countries_count < 0 OR institutions_count < 0;
+CREATE INDEX idx_papers_invalid_scores ON papers(id) WHERE citation_percentile < 0.0 OR citation_percentile > 1.0 OR primary_topic_score < 0.0 OR primary_topic_score > 1.0 OR fwci < 0.0;
+CREATE INDEX idx_papers_doi ON papers(doi) WHERE doi IS NOT NULL AND doi != '';
+
+-- Indexes for text search on titles: trigram on the short lowercased key, full-text on the tsvector
+CREATE INDEX idx_papers_title_short_trgm ON papers USING gin(title_short gin_trgm_ops);
+CREATE INDEX idx_papers_title_tsv ON papers USING gin(title_tsv);
+
+-- Keep the physical row order by publication_date (re-run CLUSTER papers; after large loads)
+ALTER TABLE papers CLUSTER ON idx_papers_publication_date;
+
+-- Data quality checks: validate_papers() is defined in validate_papers.sql.
+-- Install it with `python create_papers_table.py`, which also records the version
+-- test_papers_data.py checks for.
 
 -- Enable pg_trgm extension for text search (if not already enabled)
 -- CREATE EXTENSION IF NOT EXISTS pg_trgm;
@@ -0,0 +1,62 @@
+-- Server-side data quality checks for the papers table
+-- Returns a single row: the total row count followed by one count per check.
+-- The table setup in create_papers_table.py, pipeline.py and load_papers_from_json.py
+-- installs (or reinstalls) this function when it is missing or its definition has
+-- changed; data_quality_tests.py only reads every check in one call.
+--
+-- The field and range checks are scalar subqueries whose predicates match partial
+-- indexes from schema.sql (idx_papers_empty_title, idx_papers_negative_counts,
+-- idx_papers_invalid_scores). On a clean table those indexes are empty and the
+-- checks are answered without scanning the heap. The duplicate checks ride along
+-- with the total row count in the one full scan.
+
+DROP FUNCTION IF EXISTS validate_papers();
+
+CREATE FUNCTION validate_papers()
+RETURNS TABLE (
+    total_papers BIGINT,
+
+    -- Test 1: Missing required fields
+    missing_openalex_id BIGINT,
+    missing_title BIGINT,
+
+    -- Test 2: Citation count validation
+    negative_cited_by_count BIGINT,
+    negative_countries_count BIGINT,
+    negative_institutions_count BIGINT,
+
+    -- Test 3: Score range validation
+    invalid_citation_percentile BIGINT,
+    invalid_primary_topic_score BIGINT,
+    negative_fwci BIGINT,
+
+    -- Test 4: Duplicate detection
+    duplicate_openalex_id BIGINT,
+    duplicate_doi BIGINT
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        COUNT(*),
+
+        (SELECT COUNT(*) FROM papers WHERE openalex_id IS NULL OR openalex_id = ''),
+        (SELECT COUNT(*) FROM papers WHERE title IS NULL OR title = ''),
+
+        (SELECT COUNT(*) FROM papers WHERE cited_by_count < 0),
+        (SELECT COUNT(*) FROM papers WHERE countries_count < 0),
+        (SELECT COUNT(*) FROM papers WHERE institutions_count < 0),
+
+        (SELECT COUNT(*) FROM papers WHERE citation_percentile < 0.0 OR citation_percentile > 1.0),
+        (SELECT COUNT(*) FROM papers WHERE primary_topic_score < 0.0 OR primary_topic_score > 1.0),
+        (SELECT COUNT(*) FROM papers WHERE fwci < 0.0),
+
+        -- Rows beyond the first for each repeated value, computed in the same pass
+        -- as the total instead of a separate GROUP BY + HAVING per check
+        COUNT(openalex_id) - COUNT(DISTINCT openalex_id),
+        COUNT(doi) FILTER (WHERE doi != '') - COUNT(DISTINCT NULLIF(doi, ''))
+    FROM papers;
+END;
+$$;